@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Benchmark OUI lookups against assets/mac_unified.csv.
+
+Builds reproducible synthetic MAC corpora and times each lookup backend on
+them: cold load of the table, single lookups (ns/lookup) and batch lookups
+(ns/lookup), plus the hit rate and peak RSS of the process. Every backend
+runs in its own child process, so load time and RSS are not polluted by
+the other backends.
+
+Corpora (all seeded):
+    uniform     uniformly random 48-bit MACs
+    vendor      MACs under assigned prefixes, Zipf-skewed towards a few vendors
+    randomized  mostly locally-administered / randomized phone MACs, rest vendor
+
+Backends live in BACKENDS; an out-of-tree table layout can be compared by
+passing --backend module:attr, where attr is a Backend subclass.
+
+    python3 scripts/benchmark_oui_lookup.py [-n 200000] [--backend bisect ...] [--json out.json]
+"""
+
+import argparse
+import importlib
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from array import array
+from pathlib import Path
+from typing import Dict, List
+
+import oui_lookup
+
+CORPORA = ("uniform", "vendor", "randomized")
+
+
+class Backend(ABC):
+    """One way of loading the table and resolving packed 48-bit MACs."""
+
+    name = "?"
+
+    def available(self) -> bool:
+        return True
+
+    @abstractmethod
+    def load(self, paths: Dict[str, Path]):
+        """Load the table from the prepared ``paths``; lookups receive the result."""
+
+    def lookup(self, table, mac: int):
+        return table.lookup_int(mac)
+
+    def lookup_batch(self, table, macs: array) -> List:
+        lookup = self.lookup
+        return [lookup(table, mac) for mac in macs]
+
+
+class BisectBackend(Backend):
+    name = "bisect"
+
+    def load(self, paths):
+        return oui_lookup.OUITable.from_csv(paths["csv"])
+
+    def lookup_batch(self, table, macs):
+        return [i if i >= 0 else None for i in table.batch_indices(macs, use_numpy=False)]
+
+
+class NumpyBackend(BisectBackend):
+    name = "numpy"
+
+    def available(self):
+        return oui_lookup.np is not None
+
+    def lookup_batch(self, table, macs):
+        indices = table.batch_indices(oui_lookup.np.frombuffer(macs, dtype=oui_lookup.np.uint64))
+        return [i if i >= 0 else None for i in indices.tolist()]
+
+
+class DictEncodedBackend(BisectBackend):
+    name = "dict-csv"
+
+    def load(self, paths):
+        return oui_lookup.OUITable(oui_lookup.read_dict_rows(paths["dict"]))
+
+
+class MappedBackend(Backend):
+    name = "mmap"
+
+    def load(self, paths):
+        return oui_lookup.MappedOUITable(paths["bin"])
+
+
+class FlatBackend(Backend):
+    name = "flat"
+
+    def load(self, paths):
+        return oui_lookup.FlatOUITable(oui_lookup.read_rows(paths["csv"]))
+
+
+class FlatMappedBackend(Backend):
+    name = "flat-mmap"
+
+    def load(self, paths):
+        return oui_lookup.MappedOUITable(paths["flat"])
+
+
+BACKENDS = {b.name: b for b in (
+    BisectBackend, NumpyBackend, DictEncodedBackend, MappedBackend, FlatBackend, FlatMappedBackend,
+)}
+
+
+def resolve_backend(spec: str) -> Backend:
+    if spec in BACKENDS:
+        return BACKENDS[spec]()
+    module, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module), attr)()
+
+
+def make_corpus(kind: str, n: int, seed: int, prefixes: List[oui_lookup.OUIEntry]) -> array:
+    rnd = random.Random(f"{kind}:{seed}")
+    macs = array("Q")
+    if kind == "uniform":
+        macs.extend(rnd.getrandbits(48) for _ in range(n))
+        return macs
+    # Zipf(1.1) over a seeded shuffle of the assigned prefixes.
+    ranked = prefixes[:]
+    rnd.shuffle(ranked)
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(len(ranked))]
+    vendor_share = n if kind == "vendor" else n // 5
+    for entry in rnd.choices(ranked, weights, k=vendor_share):
+        host_bits = 48 - entry.prefix_bits
+        macs.append(int(entry.prefix, 16) << host_bits | rnd.getrandbits(host_bits))
+    for _ in range(n - vendor_share):
+        # Locally administered, unicast: bit 1 set, bit 0 clear in the first octet.
+        macs.append((rnd.getrandbits(48) | 0x02 << 40) & ~(0x01 << 40))
+    rnd.shuffle(macs)
+    return macs
+
+
+def rss_mb(field: str = "VmHWM") -> float:
+    """Peak (VmHWM) or current (VmRSS) resident set size of this process.
+
+    /proc is preferred because ru_maxrss survives exec on Linux and would
+    report the parent's peak. Elsewhere both fall back to ru_maxrss.
+    """
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def run_backend(spec: str, paths: Dict[str, Path], corpora: Dict[str, Path]) -> dict:
+    """Child-process body: cold load, then single and batch passes per corpus."""
+    backend = resolve_backend(spec)
+    loaded = {}
+    for name, path in corpora.items():
+        macs = array("Q")
+        with path.open("rb") as fh:
+            macs.frombytes(fh.read())
+        loaded[name] = macs
+    rss_before = rss_mb("VmRSS")
+    start = time.perf_counter()
+    table = backend.load(paths)
+    result = {"backend": backend.name, "load_ms": (time.perf_counter() - start) * 1000,
+              "load_rss_mb": rss_mb("VmRSS") - rss_before, "corpora": {}}
+
+    for name, macs in loaded.items():
+        lookup = backend.lookup
+        start = time.perf_counter()
+        hits = sum(1 for mac in macs if lookup(table, mac) is not None)
+        single = time.perf_counter() - start
+        start = time.perf_counter()
+        batch_hits = sum(1 for hit in backend.lookup_batch(table, macs) if hit is not None)
+        batch = time.perf_counter() - start
+        if batch_hits != hits:
+            raise SystemExit(f"{backend.name}: batch found {batch_hits} hits, single found {hits}")
+        result["corpora"][name] = {
+            "n": len(macs),
+            "hit_rate": hits / len(macs),
+            "single_ns": single / len(macs) * 1e9,
+            "batch_ns": batch / len(macs) * 1e9,
+        }
+    result["peak_rss_mb"] = rss_mb()
+    return result
+
+
+def prepare(csv_path: Path, workdir: Path, n: int, seed: int):
+    rows = list(oui_lookup.read_rows(csv_path))
+    paths = {"csv": csv_path, "bin": workdir / "mac_unified.bin", "dict": workdir / "mac_unified.dict.csv",
+             "flat": workdir / "mac_unified.flat.bin"}
+    oui_lookup.write_binary(rows, paths["bin"])
+    oui_lookup.write_flat(rows, paths["flat"])
+    oui_lookup.write_dict_encoded(rows, paths["dict"])
+    corpora = {}
+    for kind in CORPORA:
+        corpora[kind] = workdir / f"{kind}.u64"
+        with corpora[kind].open("wb") as fh:
+            make_corpus(kind, n, seed, rows).tofile(fh)
+    return paths, corpora
+
+
+def print_table(results: List[dict]) -> None:
+    print(f"{'backend':10s} {'load ms':>8s} {'load MB':>8s} {'peak MB':>8s}  "
+          f"{'corpus':10s} {'hit %':>6s} {'single ns':>10s} {'batch ns':>9s}")
+    for res in results:
+        for i, (name, c) in enumerate(res["corpora"].items()):
+            head = (f"{res['backend']:10s} {res['load_ms']:8.1f} {res['load_rss_mb']:8.1f} {res['peak_rss_mb']:8.1f}"
+                    if i == 0 else " " * 37)
+            print(f"{head}  {name:10s} {c['hit_rate'] * 100:6.1f} {c['single_ns']:10.0f} {c['batch_ns']:9.0f}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("-n", type=int, default=200_000, help="MACs per corpus (default 200000)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--csv", type=Path, default=oui_lookup.CSV_PATH)
+    ap.add_argument("--backend", action="append",
+                    help=f"backend name ({', '.join(BACKENDS)}) or module:attr; repeatable")
+    ap.add_argument("--json", type=Path, help="also write the results as JSON")
+    ap.add_argument("--child", nargs=2, metavar=("SPEC", "WORKDIR"), help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.child:
+        spec, workdir = args.child
+        setup = json.loads((Path(workdir) / "setup.json").read_text())
+        paths = {k: Path(v) for k, v in setup["paths"].items()}
+        corpora = {k: Path(v) for k, v in setup["corpora"].items()}
+        print(json.dumps(run_backend(spec, paths, corpora)))
+        return 0
+
+    specs = args.backend or list(BACKENDS)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        paths, corpora = prepare(args.csv, Path(workdir), args.n, args.seed)
+        (Path(workdir) / "setup.json").write_text(json.dumps({
+            "paths": {k: str(v) for k, v in paths.items()},
+            "corpora": {k: str(v) for k, v in corpora.items()},
+        }))
+        for spec in specs:
+            if spec in BACKENDS and not BACKENDS[spec]().available():
+                print(f"skipping {spec}: not available")
+                continue
+            proc = subprocess.run(
+                [sys.executable, __file__, "--child", spec, workdir],
+                capture_output=True, text=True,
+            )
+            if proc.returncode:
+                raise SystemExit(f"backend {spec} failed:\n{proc.stderr}")
+            results.append(json.loads(proc.stdout))
+
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps({"n": args.n, "seed": args.seed, "results": results}, indent=2))
+        print(f"wrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
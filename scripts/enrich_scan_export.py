@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Enrich a scanned-device export with OUI data from assets/mac_unified.csv.
+
+Streams a CSV (with a header row) or JSONL export of scanned devices --
+typically mac, serial and room -- and writes the same records with three
+fields added:
+
+    manufacturer   vendor owning the most specific MA-S / MA-M / MA-L block
+    registry_type  MA-S, MA-M or MA-L ("" when unassigned)
+    mac_type       normal, broadcast, multicast, locally_administered,
+                   randomized or invalid, as MACNormalizer.identifyType
+
+The reader only cuts the input into blocks of whole records (never inside
+a quoted CSV field). Parsing, lookup and serialization happen in a pool of
+worker processes, each of which loads the table once. At most two blocks
+per worker are in flight and results are written back in input order, so
+memory stays bounded on multi-million-line exports. Other fields pass
+through unchanged, as do JSONL lines that are not (valid) objects.
+
+    python3 scripts/enrich_scan_export.py scan.csv -o scan.enriched.csv
+    zcat scan.jsonl.gz | python3 scripts/enrich_scan_export.py - --format jsonl > out.jsonl
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import oui_lookup
+
+FIELDS = ["manufacturer", "registry_type", "mac_type"]
+CHUNK_SIZE = 20_000
+
+_table: Optional[oui_lookup.OUITable] = None
+
+
+def _init_worker(csv_path: Path) -> None:
+    global _table
+    _table = oui_lookup.OUITable.from_csv(csv_path)
+
+
+def _annotate(macs: List[str]) -> List[List[str]]:
+    packed = oui_lookup.pack_macs(macs)
+    annotated = []
+    for mac, entry in zip(packed, _table.lookup_batch(packed)):
+        if entry is None:
+            annotated.append(["", "", oui_lookup.classify_mac(mac)])
+        else:
+            annotated.append([entry.manufacturer, entry.registry_type, oui_lookup.classify_mac(mac)])
+    return annotated
+
+
+def enrich_csv_block(text: str, mac_column: int) -> Tuple[str, int]:
+    """Enrich a block of CSV records; returns (serialized output, records)."""
+    rows = list(csv.reader(io.StringIO(text, newline="")))
+    macs = [row[mac_column] if mac_column < len(row) else "" for row in rows]
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    for row, extra in zip(rows, _annotate(macs)):
+        writer.writerow(row + extra)
+    return out.getvalue(), len(rows)
+
+
+def enrich_jsonl_block(text: str, mac_field: str) -> Tuple[str, int]:
+    """Enrich a block of JSONL records; blank lines are dropped.
+
+    Lines that are not JSON objects -- malformed JSON included -- have
+    nowhere to put the new fields and are passed through unchanged.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            records.append(None)
+    objects = [record for record in records if isinstance(record, dict)]
+    annotated = iter(_annotate([str(record.get(mac_field) or "") for record in objects]))
+    out = []
+    for line, record in zip(lines, records):
+        if isinstance(record, dict):
+            record.update(zip(FIELDS, next(annotated)))
+            line = json.dumps(record, ensure_ascii=False)
+        out.append(line)
+    return "\n".join(out) + "\n" if out else "", len(lines)
+
+
+def _ends_in_field(line: str, in_field: bool) -> bool:
+    """Whether a CSV line ends inside a quoted field, given how it started.
+
+    Follows csv's default dialect: a quote opens a field only at the start
+    of a field, "" inside a quoted field is an escaped quote, and any other
+    quote is plain data.
+    """
+    pos, fresh = 0, not in_field
+    while True:
+        q = line.find('"', pos)
+        if q < 0:
+            return in_field
+        if in_field:
+            if line.startswith('"', q + 1):
+                pos = q + 2
+                continue
+            in_field = False
+        elif (q == 0 and fresh) or (q > 0 and line[q - 1] == ","):
+            in_field = True
+        pos = q + 1
+
+
+def blocks(lines: Iterable[str], size: int, quoted: bool = False) -> Iterator[str]:
+    """Join raw lines into blocks of ``size`` records.
+
+    With ``quoted``, no block ends inside a multi-line quoted CSV field.
+    """
+    block, records, in_field = [], 0, False
+    for line in lines:
+        block.append(line)
+        if quoted and (in_field or '"' in line):
+            in_field = _ends_in_field(line, in_field)
+        if in_field:
+            continue
+        records += 1
+        if records == size:
+            yield "".join(block)
+            block, records = [], 0
+    if block:
+        yield "".join(block)
+
+
+def run_blocks(func, texts: Iterable[str], extra, jobs: int, csv_path: Path) -> Iterator[Tuple[str, int]]:
+    """Apply ``func(text, extra)`` across ``jobs`` processes, in input order.
+
+    Only ``2 * jobs`` chunks are submitted ahead of the writer, so a slow
+    output never lets the reader run away with the whole input.
+    """
+    if jobs <= 1:
+        _init_worker(csv_path)
+        for text in texts:
+            yield func(text, extra)
+        return
+    with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(csv_path,)) as pool:
+        pending = deque()
+        for text in texts:
+            pending.append(pool.submit(func, text, extra))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def detect_format(path: str) -> str:
+    return "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("input", help="CSV or JSONL export, or - for stdin")
+    ap.add_argument("-o", "--output", help="enriched output (default stdout)")
+    ap.add_argument("--format", choices=("csv", "jsonl"), help="default: from the input suffix")
+    ap.add_argument("--mac-field", default="mac", help="column / key holding the MAC (default mac)")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                    help="worker processes; 1 enriches in-process (default: CPU count)")
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                    help=f"records per worker block (default {CHUNK_SIZE})")
+    ap.add_argument("--csv", type=Path, default=oui_lookup.CSV_PATH, help="unified OUI table")
+    args = ap.parse_args(argv)
+
+    fmt = args.format or detect_format(args.input)
+    src = (io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="") if args.input == "-"
+           else open(args.input, encoding="utf-8", newline=""))
+    dst = (io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="") if not args.output
+           else open(args.output, "w", encoding="utf-8", newline=""))
+
+    start = time.perf_counter()
+    records = 0
+    with src, dst:
+        if fmt == "csv":
+            # csv.reader pulls one line at a time, so src resumes after the header.
+            header = next(csv.reader(src), None)
+            if header is None:
+                raise SystemExit(f"{args.input}: empty export")
+            if args.mac_field not in header:
+                raise SystemExit(f"{args.input}: no {args.mac_field!r} column in {header}")
+            csv.writer(dst, lineterminator="\n").writerow(header + FIELDS)
+            func, extra = enrich_csv_block, header.index(args.mac_field)
+        else:
+            func, extra = enrich_jsonl_block, args.mac_field
+        texts = blocks(src, args.chunk_size, quoted=fmt == "csv")
+        for text, count in run_blocks(func, texts, extra, args.jobs, args.csv):
+            dst.write(text)
+            records += count
+
+    seconds = time.perf_counter() - start
+    print(f"enriched {records} records in {seconds:.1f}s ({records / max(seconds, 1e-9):,.0f}/s)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,954 @@
+#!/usr/bin/env python3
+"""Resolve MAC addresses against assets/mac_unified.csv.
+
+Loads the unified MA-L / MA-M / MA-S table written by
+update_oui_database.py into one sorted integer index per prefix length
+and resolves each MAC by binary search, most specific block first
+(MA-S 36-bit, then MA-M 28-bit, then MA-L 24-bit) -- the same order the
+app's MACDatabase.lookup uses. The other layouts update_oui_database.py
+can write (binary, dictionary-encoded, bitmap, shards, flattened, vendor
+index, canonical vendors) are read and written here too; each format is
+described on its writer or reader.
+
+    python3 scripts/oui_lookup.py 70:B3:D5:7A:BC:EF 00-00-0C-12-34-56
+    python3 scripts/oui_lookup.py --vendor-prefix "ruckus"
+"""
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import mmap
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # optional: lookup_batch falls back to bisect
+    np = None
+
+CSV_PATH = Path(__file__).resolve().parent.parent / "assets" / "mac_unified.csv"
+BIN_PATH = CSV_PATH.with_suffix(".bin")
+DICT_PATH = CSV_PATH.with_name("mac_unified.dict.csv")
+BITMAP_PATH = CSV_PATH.with_name("mac_unified.bitmap")
+SHARDS_PATH = CSV_PATH.with_name("mac_unified_shards")
+FLAT_PATH = CSV_PATH.with_name("mac_unified.flat.bin")
+VENDOR_INDEX_PATH = CSV_PATH.with_name("mac_unified.vendors.bin")
+CANONICAL_PATH = CSV_PATH.with_name("mac_unified.canonical.csv")
+
+CSV_HEADER = ["prefix", "prefix_bits", "manufacturer", "registry_type", "is_ieee_reserved"]
+SHARDS_FORMAT = "fdk-oui-shards/1"
+
+PREFIX_BITS = (36, 28, 24)
+REGISTRY_TYPES = {24: "MA-L", 28: "MA-M", 36: "MA-S"}
+
+BIN_MAGIC = b"FDKOUI\x00\x00"
+FLAT_MAGIC = b"FDKOUI\x00\x01"
+BIN_VERSION = 1
+BIN_HEADER = struct.Struct("<8sIII4x")
+_NAME_LEN = struct.Struct("<H")
+VENDOR_INDEX_MAGIC = b"FDKVND\x00\x00"
+_VENDOR_HEADER = struct.Struct("<8sIIII")
+
+BITMAP_BYTES = 1 << 21
+
+# Packed value for unparseable MACs; wider than 48 bits so it never matches.
+INVALID_MAC = 0xFFFFFFFFFFFFFFFF
+
+_SEPARATORS = re.compile(r"[:\-.\s]")
+_HEX = re.compile(r"[0-9A-F]{1,12}")
+_SPACES = re.compile(r"\s+")
+_NON_WORD = re.compile(r"[\W_]+")
+_LEGAL_SUFFIXES = frozenset((
+    "ab", "ag", "as", "bv", "co", "company", "corp", "corporation", "gmbh", "inc",
+    "incorporated", "kg", "kk", "limited", "llc", "llp", "lp", "ltd", "ltda", "nv", "oy",
+    "plc", "pte", "pty", "sa", "sarl", "sas", "se", "spa", "srl", "sro",
+))
+_RANDOMIZED_NIBBLES = frozenset((0x3, 0x5, 0x7, 0x9, 0xB, 0xD, 0xF))
+_RANDOMIZED_OCTETS = bytes(
+    octet & 0x03 == 0x02 and octet >> 4 in _RANDOMIZED_NIBBLES for octet in range(256)
+)
+
+
+class MACFlags(NamedTuple):
+    """Per-MAC flags from MACClassifier.classify, one bool array each."""
+    locally_administered: Sequence[bool]
+    multicast: Sequence[bool]
+    ieee_reserved: Sequence[bool]
+    randomized: Sequence[bool]
+    invalid: Sequence[bool]
+
+
+class OUIEntry(NamedTuple):
+    prefix: str
+    prefix_bits: int
+    manufacturer: str
+    registry_type: str
+    is_ieee_reserved: bool
+
+
+def normalize_mac(mac: str) -> str:
+    """Normalize to 12 uppercase hex digits, as MACNormalizer.normalize does."""
+    mac = mac.strip()
+    if mac[:2].lower() == "0x":
+        mac = mac[2:]
+    octets = [o for o in re.split(r"[:\-\s]", mac) if o]
+    if len(octets) == 6 and "." not in mac:
+        mac = "".join(o.zfill(2) for o in octets)
+    else:
+        mac = _SEPARATORS.sub("", mac)
+    mac = mac.upper()
+    if not _HEX.fullmatch(mac):
+        raise ValueError(f"invalid MAC address: {mac!r}")
+    return mac.zfill(12)
+
+
+def mac_to_int(mac: str) -> int:
+    return int(normalize_mac(mac), 16)
+
+
+def pack_macs(macs: Iterable[Union[str, int]]) -> List[int]:
+    """Pack MACs into 48-bit integers, mapping invalid ones to INVALID_MAC."""
+    packed = []
+    for mac in macs:
+        if isinstance(mac, int):
+            packed.append(mac)
+            continue
+        try:
+            packed.append(mac_to_int(mac))
+        except ValueError:
+            packed.append(INVALID_MAC)
+    return packed
+
+
+def classify_mac(mac: int) -> str:
+    """Classify a packed MAC the way MACNormalizer.identifyType does."""
+    if mac >> 48:
+        return "invalid"
+    if mac == 0xFFFFFFFFFFFF:
+        return "broadcast"
+    first = mac >> 40
+    if first & 0x01:
+        return "multicast"
+    if first & 0x02:
+        # identifyType's randomized prefixes are the LAA octets with an odd high nibble >= 3.
+        return "randomized" if first >> 4 in _RANDOMIZED_NIBBLES else "locally_administered"
+    return "normal"
+
+
+def parse_rows(lines: Iterable[str]) -> Iterable[OUIEntry]:
+    """Yield entries from unified-CSV lines, header included."""
+    reader = csv.reader(lines)
+    next(reader, None)
+    for row in reader:
+        if len(row) < 5:
+            continue
+        yield OUIEntry(row[0].upper(), int(row[1]), row[2], row[3], row[4].lower() == "true")
+
+
+COMPRESSED_OPENERS = {".gz": gzip.open, ".xz": lzma.open}
+
+
+def read_rows(path: Path = CSV_PATH) -> Iterable[OUIEntry]:
+    """Read the unified CSV, decompressing .gz / .xz copies on the fly."""
+    opener = COMPRESSED_OPENERS.get(path.suffix)
+    if opener is None:
+        fh = path.open(newline="", encoding="utf-8")
+    else:
+        fh = opener(path, "rt", newline="", encoding="utf-8")
+    with fh:
+        yield from parse_rows(fh)
+
+
+def write_dict_encoded(rows: Iterable[OUIEntry], path: Path = DICT_PATH) -> Tuple[int, int]:
+    """Write the dictionary-encoded table; returns (rows, distinct manufacturers).
+
+    mac_unified.dict.csv stores each manufacturer once: a ``manufacturers,N``
+    line and N names (most frequent first), then ``prefix,prefix_bits,
+    manufacturer_id,is_ieee_reserved`` rows.
+    """
+    rows = list(rows)
+    counts = Counter(entry.manufacturer for entry in rows)
+    first_seen = {}
+    for entry in rows:
+        first_seen.setdefault(entry.manufacturer, len(first_seen))
+    names = sorted(counts, key=lambda name: (-counts[name], first_seen[name]))
+    ids = {name: i for i, name in enumerate(names)}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh, lineterminator="\n")
+        writer.writerow(["manufacturers", len(names)])
+        writer.writerows([name] for name in names)
+        writer.writerow(["prefix", "prefix_bits", "manufacturer_id", "is_ieee_reserved"])
+        writer.writerows(
+            (e.prefix, e.prefix_bits, ids[e.manufacturer], int(e.is_ieee_reserved)) for e in rows
+        )
+    return len(rows), len(names)
+
+
+def read_dict_rows(path: Path = DICT_PATH) -> Iterable[OUIEntry]:
+    """Read write_dict_encoded() output; entries share one str per manufacturer."""
+    with path.open(newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        tag, count = next(reader)
+        if tag != "manufacturers":
+            raise ValueError(f"{path} is not a dictionary-encoded OUI table")
+        names = [next(reader)[0] for _ in range(int(count))]
+        next(reader, None)
+        kinds = {str(bits): (bits, registry) for bits, registry in REGISTRY_TYPES.items()}
+        for prefix, bits, name_id, reserved in reader:
+            prefix_bits, registry = kinds[bits]
+            yield OUIEntry(prefix, prefix_bits, names[int(name_id)], registry, reserved == "1")
+
+
+def build_bitmap(rows: Iterable[OUIEntry]) -> bytearray:
+    bitmap = bytearray(BITMAP_BYTES)
+    for entry in rows:
+        oui = int(entry.prefix, 16) >> (entry.prefix_bits - 24)
+        bitmap[oui >> 3] |= 1 << (oui & 7)
+    return bitmap
+
+
+def write_bitmap(rows: Iterable[OUIEntry], path: Path = BITMAP_PATH) -> int:
+    """Write the 24-bit OUI bitmap; returns the number of OUIs flagged.
+
+    mac_unified.bitmap holds one bit per OUI (2 MiB, bit ``oui & 7`` of byte
+    ``oui >> 3``), set when the OUI is assigned or holds an MA-M / MA-S
+    sub-allocation.
+    """
+    bitmap = build_bitmap(rows)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bitmap)
+    return sum(bin(byte).count("1") for byte in bitmap)
+
+
+class OUIBitmap:
+    """Constant-time "can this MAC have a vendor?" check over 24-bit OUIs.
+
+    A clear bit proves a MAC has no vendor, so randomized addresses are
+    rejected without a search; OUITable keeps the same bitmap in memory as
+    its pre-filter.
+    """
+
+    def __init__(self, bitmap):
+        if len(bitmap) != BITMAP_BYTES:
+            raise ValueError(f"OUI bitmap must be {BITMAP_BYTES} bytes, got {len(bitmap)}")
+        self._bitmap = bitmap
+
+    @classmethod
+    def from_file(cls, path: Path = BITMAP_PATH) -> "OUIBitmap":
+        with path.open("rb") as fh:
+            return cls(mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __contains__(self, mac: int) -> bool:
+        oui = mac >> 24
+        return oui < 1 << 24 and bool(self._bitmap[oui >> 3] >> (oui & 7) & 1)
+
+    def known_mask(self, macs):
+        """Vectorized ``__contains__`` over a uint64 array (NumPy only)."""
+        bits = np.frombuffer(self._bitmap, dtype=np.uint8)
+        ouis = np.asarray(macs, dtype=np.uint64) >> np.uint64(24)
+        valid = ouis < np.uint64(1 << 24)
+        ouis = np.where(valid, ouis, np.uint64(0))
+        return valid & ((bits[ouis >> np.uint64(3)] >> (ouis & np.uint64(7)).astype(np.uint8)) & 1).astype(bool)
+
+
+class OUITable:
+    """Sorted, integer-keyed index over the unified OUI rows.
+
+    Each prefix length gets its own ``array('Q')`` of prefix values; the
+    matching rows live in ``entries``, grouped 36/28/24 in key order, so a
+    lookup is at most three bisections. A MAC whose OUI is clear in
+    ``bitmap`` (None when built with ``bitmap=False``) is rejected before
+    any bisection. Duplicate assignments keep the last row, matching the
+    app's map semantics.
+    """
+
+    def __init__(self, rows: Iterable[OUIEntry], bitmap: bool = True):
+        by_bits = {bits: {} for bits in PREFIX_BITS}
+        for entry in rows:
+            if entry.prefix_bits in by_bits:
+                by_bits[entry.prefix_bits][int(entry.prefix, 16)] = entry
+        self._keys = {}
+        self._offsets = {}
+        self.entries: List[OUIEntry] = []
+        for bits, table in by_bits.items():
+            ordered = sorted(table)
+            self._keys[bits] = array("Q", ordered)
+            self._offsets[bits] = len(self.entries)
+            self.entries.extend(table[k] for k in ordered)
+        # Small tables (shards, flattening input) skip the 2 MiB pre-filter.
+        self._bits = build_bitmap(self.entries) if bitmap else None
+        self.bitmap = OUIBitmap(self._bits) if bitmap else None
+
+    @classmethod
+    def from_csv(cls, path: Path = CSV_PATH) -> "OUITable":
+        return cls(read_rows(path))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def index_int(self, mac: int) -> int:
+        oui = mac >> 24
+        if oui >> 24:
+            return -1
+        if self._bits is not None and not self._bits[oui >> 3] >> (oui & 7) & 1:
+            return -1
+        for bits in PREFIX_BITS:
+            keys = self._keys[bits]
+            probe = mac >> (48 - bits)
+            i = bisect_left(keys, probe)
+            if i < len(keys) and keys[i] == probe:
+                return self._offsets[bits] + i
+        return -1
+
+    def lookup_int(self, mac: int) -> Optional[OUIEntry]:
+        i = self.index_int(mac)
+        return self.entries[i] if i >= 0 else None
+
+    def lookup(self, mac: str) -> Optional[OUIEntry]:
+        return self.lookup_int(mac_to_int(mac))
+
+    def batch_indices(self, packed: Sequence[int], use_numpy: Optional[bool] = None):
+        """Resolve packed MACs to indices into ``entries`` (-1 = no match).
+
+        Returns an int64 ndarray on the NumPy path and a list otherwise.
+        """
+        if use_numpy is None:
+            use_numpy = np is not None
+        if not use_numpy:
+            return [self.index_int(mac) for mac in packed]
+        macs = np.asarray(packed, dtype=np.uint64)
+        result = np.full(macs.shape, -1, dtype=np.int64)
+        if self.bitmap is not None:
+            known = self.bitmap.known_mask(macs)
+        else:
+            known = (macs >> np.uint64(48)) == 0
+        candidates = macs[known]
+        found = np.full(candidates.shape, -1, dtype=np.int64)
+        for bits in PREFIX_BITS:
+            keys = np.frombuffer(self._keys[bits], dtype=np.uint64)
+            if not len(keys):
+                continue
+            probe = candidates >> np.uint64(48 - bits)
+            idx = np.searchsorted(keys, probe)
+            np.minimum(idx, len(keys) - 1, out=idx)
+            hit = (keys[idx] == probe) & (found < 0)
+            found[hit] = idx[hit] + self._offsets[bits]
+        result[known] = found
+        return result
+
+    def lookup_batch(
+        self, macs: Iterable[Union[str, int]], use_numpy: Optional[bool] = None
+    ) -> List[Optional[OUIEntry]]:
+        """Resolve a whole column of MACs.
+
+        With NumPy the MACs are packed into uint64 and resolved with one
+        searchsorted pass per prefix length; without it, the per-MAC bisect
+        path gives identical results.
+        """
+        if np is not None and isinstance(macs, np.ndarray) and macs.dtype.kind in "iu":
+            packed = macs
+        else:
+            packed = pack_macs(macs)
+        indices = self.batch_indices(packed, use_numpy)
+        if not isinstance(indices, list):
+            indices = indices.tolist()
+        entries = self.entries
+        return [entries[i] if i >= 0 else None for i in indices]
+
+    def manufacturer(self, mac: str, default: str = "Unknown") -> str:
+        entry = self.lookup(mac)
+        return entry.manufacturer if entry else default
+
+
+class MACClassifier:
+    """Bulk MAC flags from bit tests alone, ahead of any vendor lookup.
+
+    locally_administered and multicast are the two low bits of the first
+    octet; randomized is classify_mac's "randomized" (unicast LAA with an odd
+    high nibble >= 3); ieee_reserved is the is_ieee_reserved column of the
+    most specific entry the MAC resolves to, so an MA-M / MA-S assignment
+    under a reserved MA-L parent is not flagged. MACs that do not fit in 48
+    bits (INVALID_MAC from pack_macs) are flagged invalid and nothing else.
+    """
+
+    def __init__(self, rows: Iterable[OUIEntry]):
+        self.table = OUITable(rows)
+        self._reserved = bytes(e.is_ieee_reserved for e in self.table.entries)
+
+    @classmethod
+    def from_csv(cls, path: Path = CSV_PATH) -> "MACClassifier":
+        return cls(read_rows(path))
+
+    def classify(self, macs: Iterable[Union[str, int]], use_numpy: Optional[bool] = None) -> MACFlags:
+        """Flag every MAC; bool ndarrays on the NumPy path, lists otherwise."""
+        if use_numpy is None:
+            use_numpy = np is not None
+        if not (np is not None and isinstance(macs, np.ndarray) and macs.dtype.kind in "iu"):
+            macs = pack_macs(macs)
+        indices = self.table.batch_indices(macs, use_numpy)
+        if not use_numpy:
+            flags = MACFlags([], [], [], [], [])
+            for mac, index in zip(macs, indices):
+                valid = not mac >> 48
+                first = mac >> 40 if valid else 0
+                flags.locally_administered.append(bool(first & 0x02))
+                flags.multicast.append(bool(first & 0x01))
+                flags.ieee_reserved.append(index >= 0 and bool(self._reserved[index]))
+                flags.randomized.append(bool(_RANDOMIZED_OCTETS[first]))
+                flags.invalid.append(not valid)
+            return flags
+        macs = np.asarray(macs, dtype=np.uint64)
+        invalid = (macs >> np.uint64(48)) != 0
+        first = np.where(invalid, np.uint64(0), macs >> np.uint64(40)).astype(np.uint8)
+        reserved = np.zeros(macs.shape, dtype=bool)
+        hit = indices >= 0
+        reserved[hit] = np.frombuffer(self._reserved, dtype=np.bool_)[indices[hit]]
+        return MACFlags(
+            locally_administered=(first & 0x02).astype(bool),
+            multicast=(first & 0x01).astype(bool),
+            ieee_reserved=reserved,
+            randomized=np.frombuffer(_RANDOMIZED_OCTETS, dtype=np.bool_)[first],
+            invalid=invalid,
+        )
+
+
+def write_shards(rows: Iterable[OUIEntry], directory: Path = SHARDS_PATH) -> dict:
+    """Write one CSV per first MAC byte plus manifest.json; returns the manifest.
+
+    Each shard is an ordinary unified CSV named after its first byte
+    (XX.csv); the manifest records each shard's row offset in the unified
+    table, row count, size and SHA-256. ``rows`` must be in unified-table
+    order, which keeps each shard contiguous. Shards listed in a previous
+    manifest that are no longer produced are removed; no other file in
+    ``directory`` is touched.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    previous = {}
+    manifest_path = directory / "manifest.json"
+    if manifest_path.exists():
+        old = json.loads(manifest_path.read_text())
+        if old.get("format") != SHARDS_FORMAT:
+            raise ValueError(f"{manifest_path} is not a {SHARDS_FORMAT} manifest; refusing to overwrite it")
+        previous = old["shards"]
+    shards = {}
+    offset = 0
+    for first, group in groupby(rows, key=lambda entry: entry.prefix[:2]):
+        if first in shards:
+            raise ValueError(f"rows for first byte {first} are not contiguous")
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(CSV_HEADER)
+        count = 0
+        for e in group:
+            writer.writerow([e.prefix, e.prefix_bits, e.manufacturer, e.registry_type,
+                             "true" if e.is_ieee_reserved else "false"])
+            count += 1
+        data = buf.getvalue().encode("utf-8")
+        (directory / f"{first}.csv").write_bytes(data)
+        shards[first] = {"file": f"{first}.csv", "row_offset": offset, "rows": count,
+                         "bytes": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+        offset += count
+    manifest = {"format": SHARDS_FORMAT, "rows": offset, "shards": shards}
+    manifest_path.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    for first, meta in previous.items():
+        if first not in shards:
+            (directory / meta["file"]).unlink(missing_ok=True)
+    return manifest
+
+
+class ShardedOUITable:
+    """OUI lookups over write_shards() output.
+
+    Shards are loaded, and checked against their manifest hash, on first use.
+    """
+
+    def __init__(self, directory: Path = SHARDS_PATH, verify: bool = True):
+        manifest = json.loads((directory / "manifest.json").read_text())
+        if manifest.get("format") != SHARDS_FORMAT:
+            raise ValueError(f"{directory} does not hold {SHARDS_FORMAT} shards")
+        self._dir = directory
+        self._verify = verify
+        self._shards = manifest["shards"]
+        self._loaded: Dict[int, Optional[OUITable]] = {}
+
+    @property
+    def loaded_shards(self) -> List[str]:
+        return [f"{first:02X}" for first, table in self._loaded.items() if table is not None]
+
+    def _shard(self, first: int) -> Optional[OUITable]:
+        if first in self._loaded:
+            return self._loaded[first]
+        meta = self._shards.get(f"{first:02X}")
+        table = None
+        if meta is not None:
+            data = (self._dir / meta["file"]).read_bytes()
+            if self._verify and hashlib.sha256(data).hexdigest() != meta["sha256"]:
+                raise ValueError(f"shard {meta['file']} does not match its manifest hash")
+            table = OUITable(parse_rows(io.StringIO(data.decode("utf-8"), newline="")), bitmap=False)
+        self._loaded[first] = table
+        return table
+
+    def lookup_int(self, mac: int) -> Optional[OUIEntry]:
+        first = mac >> 40
+        table = self._shard(first) if first < 256 else None
+        return table.lookup_int(mac) if table is not None else None
+
+    def lookup(self, mac: str) -> Optional[OUIEntry]:
+        return self.lookup_int(mac_to_int(mac))
+
+
+def _fold(name: str) -> str:
+    return _SPACES.sub(" ", name).strip().casefold()
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _posting_typecode(names: int) -> str:
+    # Posting ids are name indices; u16 covers today's ~30k distinct names.
+    return "H" if names <= 1 << 16 else "I"
+
+
+class VendorIndex:
+    """Trigram inverted index from manufacturer substrings to their prefixes.
+
+    Answers the reverse query -- every prefix a vendor owns -- over the
+    distinct manufacturer names. Names are case-folded and
+    whitespace-collapsed; a leading \\x02 marks the start of a name so
+    prefix queries probe an anchored trigram. Candidates from the
+    posting-list intersection are confirmed against the name itself, so
+    results are exact.
+
+    Apart from the names, everything lives in flat integer arrays. ``keys``
+    packs each owned prefix as ``prefix << 8 | prefix_bits``, grouped per
+    name by ``name_offsets``. Each trigram's posting list is the slice of
+    ``ids`` that ``gram_offsets`` delimits. write() stores the arrays as they
+    are in mac_unified.vendors.bin -- an 8s magic and u32 name / key /
+    trigram / posting counts, then the u64 keys, u32 name and trigram
+    offsets, u16 posting ids (u32 past 65536 names), and the names and
+    trigrams as \\x00-separated UTF-8 -- so load() is one read plus a few
+    frombytes calls.
+    """
+
+    def __init__(self, names: List[str], name_offsets: array, keys: array,
+                 grams: List[str], gram_offsets: array, ids: array):
+        self.names = names
+        self._name_offsets = name_offsets
+        self._keys = keys
+        self._grams = {gram: i for i, gram in enumerate(grams)}
+        self._gram_offsets = gram_offsets
+        self._ids = ids
+        self._folded = [_fold(name) for name in names]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[OUIEntry]) -> "VendorIndex":
+        owned: Dict[str, List[int]] = {}
+        for e in rows:
+            owned.setdefault(e.manufacturer, []).append(int(e.prefix, 16) << 8 | e.prefix_bits)
+        names = sorted(owned)
+        name_offsets, keys = array("I", [0]), array("Q")
+        postings: Dict[str, List[int]] = {}
+        for i, name in enumerate(names):
+            keys.extend(owned[name])
+            name_offsets.append(len(keys))
+            for gram in _trigrams("\x02" + _fold(name)):
+                postings.setdefault(gram, []).append(i)
+        grams = sorted(postings)
+        gram_offsets, ids = array("I", [0]), array(_posting_typecode(len(names)))
+        for gram in grams:
+            ids.extend(postings[gram])
+            gram_offsets.append(len(ids))
+        return cls(names, name_offsets, keys, grams, gram_offsets, ids)
+
+    @classmethod
+    def load(cls, path: Path = VENDOR_INDEX_PATH) -> "VendorIndex":
+        data = path.read_bytes()
+        magic, n_names, n_keys, n_grams, n_ids = _VENDOR_HEADER.unpack_from(data, 0)
+        if magic != VENDOR_INDEX_MAGIC:
+            raise ValueError(f"{path} is not an OUI vendor index")
+        pos = _VENDOR_HEADER.size
+        columns = []
+        for typecode, count in (("Q", n_keys), ("I", n_names + 1), ("I", n_grams + 1),
+                                (_posting_typecode(n_names), n_ids)):
+            column = array(typecode)
+            column.frombytes(data[pos:pos + column.itemsize * count])
+            if sys.byteorder != "little":
+                column.byteswap()
+            pos += column.itemsize * count
+            columns.append(column)
+        keys, name_offsets, gram_offsets, ids = columns
+        strings = data[pos:].decode("utf-8").split("\x00")
+        names, grams = strings[:n_names], strings[n_names:n_names + n_grams]
+        return cls(names, name_offsets, keys, grams, gram_offsets, ids)
+
+    def write(self, path: Path = VENDOR_INDEX_PATH) -> int:
+        """Persist the index; returns the number of trigrams."""
+        columns = [array(column.typecode, column)
+                   for column in (self._keys, self._name_offsets, self._gram_offsets, self._ids)]
+        if sys.byteorder != "little":
+            for column in columns:
+                column.byteswap()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as fh:
+            fh.write(_VENDOR_HEADER.pack(VENDOR_INDEX_MAGIC, len(self.names), len(self._keys),
+                                         len(self._grams), len(self._ids)))
+            for column in columns:
+                fh.write(column.tobytes())
+            fh.write("\x00".join(self.names + list(self._grams)).encode("utf-8"))
+        return len(self._grams)
+
+    def _posting(self, gram: str) -> Sequence[int]:
+        i = self._grams.get(gram)
+        if i is None:
+            return ()
+        return self._ids[self._gram_offsets[i]:self._gram_offsets[i + 1]]
+
+    def _match(self, query: str, prefix: bool) -> List[int]:
+        needle = _fold(query)
+        probe = "\x02" + needle if prefix else needle
+        grams = _trigrams(probe)
+        if grams:
+            lists = sorted((self._posting(gram) for gram in grams), key=len)
+            candidates = set(lists[0])
+            for ids in lists[1:]:
+                if not candidates:
+                    break
+                candidates.intersection_update(ids)
+            candidates = sorted(candidates)
+        else:
+            # Shorter than a trigram: nothing to probe, scan the distinct names.
+            candidates = range(len(self.names))
+        folded = self._folded
+        if prefix:
+            return [i for i in candidates if folded[i].startswith(needle)]
+        return [i for i in candidates if needle in folded[i]]
+
+    def prefixes(self, i: int) -> List[str]:
+        """``PREFIX/bits`` assignments of ``names[i]``, in table order."""
+        keys = self._keys[self._name_offsets[i]:self._name_offsets[i + 1]]
+        return [f"{key >> 8:0{(key & 0xFF) // 4}X}/{key & 0xFF}" for key in keys]
+
+    def search(self, query: str, prefix: bool = False) -> List[str]:
+        """Manufacturer names containing (or, with ``prefix``, starting with) ``query``."""
+        return [self.names[i] for i in self._match(query, prefix)]
+
+    def find(self, query: str, prefix: bool = False) -> Dict[str, List[str]]:
+        """Map each matching manufacturer to its ``PREFIX/bits`` assignments."""
+        return {self.names[i]: self.prefixes(i) for i in self._match(query, prefix)}
+
+
+def canonical_vendor_key(name: str) -> str:
+    """Grouping key: case-fold, drop dots and punctuation, strip trailing legal-form words."""
+    words = _NON_WORD.sub(" ", name.casefold().replace(".", "")).split()
+    while len(words) > 1 and words[-1] in _LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def write_canonical(rows: Iterable[OUIEntry], path: Path = CANONICAL_PATH) -> Tuple[int, int]:
+    """Write the canonical vendor side table; returns (rows, vendors).
+
+    mac_unified.canonical.csv groups the registry's inconsistent spellings
+    ("Cisco Systems, Inc", "Cisco Systems Inc") under one integer vendor
+    id: a ``vendors,N`` line and N display names (the id is the line
+    order), then ``prefix,prefix_bits,vendor_id`` rows in table order. A
+    vendor's display name is its most common spelling, with ties going to
+    the alphabetically first. Ids are assigned largest vendor first, with
+    ties broken by key, so the file only changes when the registry does.
+    """
+    rows = list(rows)
+    keys = {name: canonical_vendor_key(name) for name in {e.manufacturer for e in rows}}
+    spellings: Dict[str, Counter] = {}
+    for e in rows:
+        spellings.setdefault(keys[e.manufacturer], Counter())[e.manufacturer] += 1
+    order = sorted(spellings, key=lambda key: (-sum(spellings[key].values()), key))
+    ids = {key: i for i, key in enumerate(order)}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh, lineterminator="\n")
+        writer.writerow(["vendors", len(order)])
+        for key in order:
+            counts = spellings[key]
+            writer.writerow([min(counts, key=lambda name: (-counts[name], name))])
+        writer.writerow(["prefix", "prefix_bits", "vendor_id"])
+        writer.writerows((e.prefix, e.prefix_bits, ids[keys[e.manufacturer]]) for e in rows)
+    return len(rows), len(order)
+
+
+class CanonicalVendors:
+    """Canonical vendor id and display name per (prefix, prefix_bits)."""
+
+    def __init__(self, path: Path = CANONICAL_PATH):
+        with path.open(newline="", encoding="utf-8") as fh:
+            reader = csv.reader(fh)
+            tag, count = next(reader)
+            if tag != "vendors":
+                raise ValueError(f"{path} is not a canonical vendor table")
+            self.names: List[str] = [next(reader)[0] for _ in range(int(count))]
+            next(reader, None)
+            self._ids = {(prefix, int(bits)): int(vendor_id) for prefix, bits, vendor_id in reader}
+
+    def vendor_id(self, entry: OUIEntry) -> int:
+        """Canonical id of ``entry``'s vendor, or -1 if it is not in the table."""
+        return self._ids.get((entry.prefix, entry.prefix_bits), -1)
+
+    def display_name(self, entry: OUIEntry) -> str:
+        vendor_id = self.vendor_id(entry)
+        return self.names[vendor_id] if vendor_id >= 0 else entry.manufacturer
+
+
+def _write_columns(path: Path, magic: bytes, keyed: List[Tuple[int, Optional[OUIEntry]]]) -> int:
+    keys = array("Q")
+    names = array("I")
+    flags = bytearray()
+    strings = bytearray()
+    offsets = {}
+    for key, entry in keyed:
+        keys.append(key)
+        if entry is None:
+            names.append(0)
+            flags.append(0)
+            continue
+        offset = offsets.get(entry.manufacturer)
+        if offset is None:
+            encoded = entry.manufacturer.encode("utf-8")
+            offset = offsets[entry.manufacturer] = len(strings)
+            strings += _NAME_LEN.pack(len(encoded)) + encoded
+        names.append(offset)
+        flags.append(1 if entry.is_ieee_reserved else 0)
+    if sys.byteorder != "little":
+        keys.byteswap()
+        names.byteswap()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as fh:
+        fh.write(BIN_HEADER.pack(magic, BIN_VERSION, len(keys), len(strings)))
+        fh.write(keys.tobytes())
+        fh.write(names.tobytes())
+        fh.write(flags)
+        fh.write(strings)
+    return len(keys)
+
+
+def write_binary(rows: Iterable[OUIEntry], path: Path = BIN_PATH) -> int:
+    """Write the mmap-able binary table; returns the number of rows.
+
+    mac_unified.bin is a columnar little-endian image of the table:
+
+        header   8s magic, u32 version, u32 row count, u32 string-table size, 4x
+        keys     u64[n]  (prefix << (48 - prefix_bits)) << 8 | prefix_bits, sorted
+        names    u32[n]  offset of the manufacturer in the string table
+        flags    u8[n]   bit 0 = is_ieee_reserved
+        strings  interned manufacturers, each a u16 length + UTF-8 bytes
+    """
+    table = {}
+    for entry in rows:
+        key = (int(entry.prefix, 16) << (48 - entry.prefix_bits)) << 8 | entry.prefix_bits
+        table[key] = entry
+    return _write_columns(path, BIN_MAGIC, [(key, table[key]) for key in sorted(table)])
+
+
+def flatten(table: OUITable) -> Tuple[array, array]:
+    """Flatten nested prefix blocks into disjoint runs.
+
+    Many MA-L parents are "IEEE Registration Authority" placeholders for
+    their MA-M / MA-S children; resolving the nesting ahead of time makes a
+    lookup a single bisect_right instead of the 36-then-28-then-24 sequence.
+
+    Returns parallel ``starts`` / ``indices`` arrays: addresses from
+    ``starts[i]`` up to the next start resolve to ``table.entries[indices[i]]``
+    (-1 = unassigned). Aligned prefix blocks are either nested or disjoint,
+    so one sweep in (start, prefix_bits) order with a stack of enclosing
+    blocks finds the most specific entry for every run.
+    """
+    blocks = sorted(
+        (int(e.prefix, 16) << (48 - e.prefix_bits), e.prefix_bits, i)
+        for i, e in enumerate(table.entries)
+    )
+    starts, indices = array("Q", [0]), array("l", [-1])
+
+    def emit(pos: int, index: int) -> None:
+        if starts[-1] == pos:
+            starts.pop()
+            indices.pop()
+        if not indices or indices[-1] != index:
+            starts.append(pos)
+            indices.append(index)
+
+    stack = []
+    for start, bits, index in blocks:
+        while stack and stack[-1][0] <= start:
+            end, _ = stack.pop()
+            emit(end, stack[-1][1] if stack else -1)
+        emit(start, index)
+        stack.append((start + (1 << (48 - bits)), index))
+    while stack:
+        end, _ = stack.pop()
+        if end < 1 << 48:
+            emit(end, stack[-1][1] if stack else -1)
+    return starts, indices
+
+
+class FlatOUITable:
+    """In-memory flattened table: one bisect_right per lookup."""
+
+    def __init__(self, rows: Iterable[OUIEntry]):
+        table = OUITable(rows, bitmap=False)
+        self.entries = table.entries
+        self._starts, self._indices = flatten(table)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def lookup_int(self, mac: int) -> Optional[OUIEntry]:
+        if mac >> 48:
+            return None
+        index = self._indices[bisect_right(self._starts, mac) - 1]
+        return self.entries[index] if index >= 0 else None
+
+    def lookup(self, mac: str) -> Optional[OUIEntry]:
+        return self.lookup_int(mac_to_int(mac))
+
+
+def write_flat(rows: Iterable[OUIEntry], path: Path = FLAT_PATH) -> int:
+    """Write the flattened runs in the binary layout; returns the run count.
+
+    The file is write_binary()'s layout under FLAT_MAGIC, with one key per
+    run whose low byte holds the owning entry's prefix_bits (0 for
+    unassigned gaps).
+    """
+    table = OUITable(rows, bitmap=False)
+    starts, indices = flatten(table)
+    keyed = []
+    for start, index in zip(starts, indices):
+        entry = table.entries[index] if index >= 0 else None
+        keyed.append((start << 8 | (entry.prefix_bits if entry else 0), entry))
+    return _write_columns(path, FLAT_MAGIC, keyed)
+
+
+def verify_flat(flat, table: OUITable) -> int:
+    """Prove ``flat`` resolves every address exactly like ``table``.
+
+    Both lookups are constant between consecutive block boundaries, so
+    comparing them at every boundary (each block's first address and the
+    first address past it) covers all 2**48 MACs. Raises ValueError on the
+    first mismatch; returns the number of boundaries checked.
+    """
+    boundaries = {0}
+    for e in table.entries:
+        start = int(e.prefix, 16) << (48 - e.prefix_bits)
+        boundaries.add(start)
+        boundaries.add(start + (1 << (48 - e.prefix_bits)))
+    boundaries.discard(1 << 48)
+    for mac in sorted(boundaries):
+        expected, got = table.lookup_int(mac), flat.lookup_int(mac)
+        if expected != got:
+            raise ValueError(f"flattened lookup of {mac:012X} gave {got}, expected {expected}")
+    return len(boundaries)
+
+
+class MappedOUITable:
+    """Read-only view of mac_unified.bin (or .flat.bin) backed by mmap.
+
+    Opening the file maps it and casts the key and name-offset columns to
+    memoryviews; nothing is decoded per row. Each lookup bisects the key
+    column in place and only materializes the matching entry.
+    """
+
+    def __init__(self, path: Path = BIN_PATH):
+        if sys.byteorder != "little":
+            raise ValueError("MappedOUITable needs a little-endian host")
+        with path.open("rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, strings_size = BIN_HEADER.unpack_from(self._mm, 0)
+        if magic not in (BIN_MAGIC, FLAT_MAGIC) or version != BIN_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a v{BIN_VERSION} OUI table")
+        self.flat = magic == FLAT_MAGIC
+        view = memoryview(self._mm)
+        start = BIN_HEADER.size
+        self._keys = view[start:start + 8 * count].cast("Q")
+        start += 8 * count
+        self._names = view[start:start + 4 * count].cast("I")
+        start += 4 * count
+        self._flags = view[start:start + count]
+        self._strings_start = start + count
+        self._view = view
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __enter__(self) -> "MappedOUITable":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for view in (self._keys, self._names, self._flags, self._view):
+            view.release()
+        self._mm.close()
+
+    def _entry(self, i: int) -> OUIEntry:
+        key = self._keys[i]
+        bits = key & 0xFF
+        offset = self._strings_start + self._names[i]
+        (length,) = _NAME_LEN.unpack_from(self._mm, offset)
+        name = self._mm[offset + 2:offset + 2 + length].decode("utf-8")
+        prefix = format((key >> 8) >> (48 - bits), f"0{bits // 4}X")
+        return OUIEntry(prefix, bits, name, REGISTRY_TYPES[bits], bool(self._flags[i] & 1))
+
+    def lookup_int(self, mac: int) -> Optional[OUIEntry]:
+        keys = self._keys
+        if self.flat:
+            if mac >> 48:
+                return None
+            i = bisect_right(keys, mac << 8 | 0xFF) - 1
+            return self._entry(i) if keys[i] & 0xFF else None
+        for bits in PREFIX_BITS:
+            probe = (mac >> (48 - bits) << (48 - bits)) << 8 | bits
+            i = bisect_left(keys, probe)
+            if i < len(keys) and keys[i] == probe:
+                return self._entry(i)
+        return None
+
+    def lookup(self, mac: str) -> Optional[OUIEntry]:
+        return self.lookup_int(mac_to_int(mac))
+
+
+def main(argv: List[str]) -> int:
+    if not argv or argv[0] in ("--vendor", "--vendor-prefix") and len(argv) != 2:
+        print("usage: oui_lookup.py MAC [MAC ...] | --vendor[-prefix] NAME", file=sys.stderr)
+        return 2
+    if argv[0] in ("--vendor", "--vendor-prefix"):
+        index = VendorIndex.load() if VENDOR_INDEX_PATH.exists() else VendorIndex.from_rows(read_rows())
+        for name, prefixes in index.find(argv[1], prefix=argv[0] == "--vendor-prefix").items():
+            print(f"{name}\t{' '.join(prefixes)}")
+        return 0
+    table = OUITable.from_csv()
+    for mac in argv:
+        try:
+            entry = table.lookup(mac)
+        except ValueError as exc:
+            print(f"{mac}\t{exc}")
+            continue
+        if entry is None:
+            print(f"{mac}\tUnknown")
+        else:
+            print(f"{mac}\t{entry.manufacturer}\t{entry.registry_type}/{entry.prefix}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
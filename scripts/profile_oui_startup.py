@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Profile app-startup cost of each candidate OUI asset format.
+
+For every format, a fresh child process loads the table into lookup
+structures and reports the load time, the resident memory the load added,
+and the latency of the first lookup after the load. Each format runs
+--runs times in new processes, so every load is a cold start in the
+interpreter (the file itself stays in the page cache). The table reports
+the best load time and the median memory and first-lookup latency.
+
+Formats:
+    csv       assets/mac_unified.csv parsed into OUITable (today's path)
+    csv.gz    the same CSV gzip-compressed, decompressed while parsing
+    csv.xz    the same CSV lzma-compressed, decompressed while parsing
+    dict-csv  dictionary-encoded CSV (oui_lookup.write_dict_encoded)
+    bin       sorted binary image, mmapped (oui_lookup.MappedOUITable)
+
+    python3 scripts/profile_oui_startup.py [--runs 5] [--format csv ...] [--json out.json]
+"""
+
+import argparse
+import gzip
+import json
+import lzma
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import oui_lookup
+from benchmark_oui_lookup import rss_mb
+
+
+LOADERS: Dict[str, Callable[[Path], object]] = {
+    "csv": oui_lookup.OUITable.from_csv,
+    "csv.gz": oui_lookup.OUITable.from_csv,
+    "csv.xz": oui_lookup.OUITable.from_csv,
+    "dict-csv": lambda path: oui_lookup.OUITable(oui_lookup.read_dict_rows(path)),
+    "bin": oui_lookup.MappedOUITable,
+}
+
+
+def prepare(csv_path: Path, workdir: Path) -> Dict[str, Path]:
+    rows = list(oui_lookup.read_rows(csv_path))
+    paths = {"csv": csv_path, "csv.gz": workdir / "mac_unified.csv.gz", "csv.xz": workdir / "mac_unified.csv.xz",
+             "dict-csv": workdir / "mac_unified.dict.csv", "bin": workdir / "mac_unified.bin"}
+    data = csv_path.read_bytes()
+    paths["csv.gz"].write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    paths["csv.xz"].write_bytes(lzma.compress(data, preset=9 | lzma.PRESET_EXTREME))
+    oui_lookup.write_dict_encoded(rows, paths["dict-csv"])
+    oui_lookup.write_binary(rows, paths["bin"])
+    return paths
+
+
+def run_format(fmt: str, path: Path, mac: int) -> dict:
+    """Child-process body: one cold load and one first lookup."""
+    rss_before = rss_mb("VmRSS")
+    start = time.perf_counter()
+    table = LOADERS[fmt](path)
+    load = time.perf_counter() - start
+    rss_after = rss_mb("VmRSS")
+    start = time.perf_counter()
+    entry = table.lookup_int(mac)
+    first = time.perf_counter() - start
+    if entry is None:
+        raise SystemExit(f"{fmt}: probe MAC {mac:012X} did not resolve")
+    return {"load_ms": load * 1000, "rss_mb": rss_after - rss_before, "first_lookup_us": first * 1e6}
+
+
+def profile(fmt: str, path: Path, mac: int, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, __file__, "--child", fmt, str(path), str(mac)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode:
+            raise SystemExit(f"format {fmt} failed:\n{proc.stderr}")
+        samples.append(json.loads(proc.stdout))
+    return {
+        "format": fmt,
+        "bytes": path.stat().st_size,
+        "load_ms": min(s["load_ms"] for s in samples),
+        "rss_mb": statistics.median(s["rss_mb"] for s in samples),
+        "first_lookup_us": statistics.median(s["first_lookup_us"] for s in samples),
+        "samples": samples,
+    }
+
+
+def print_table(results: List[dict]) -> None:
+    base = next((r for r in results if r["format"] == "csv"), results[0])
+    print(f"{'format':9s} {'size KB':>8s} {'load ms':>8s} {'vs csv':>7s} {'RSS MB':>7s} {'first us':>9s}")
+    for r in results:
+        print(f"{r['format']:9s} {r['bytes'] / 1024:8.0f} {r['load_ms']:8.1f} "
+              f"{r['load_ms'] / base['load_ms']:6.2f}x {r['rss_mb']:7.1f} {r['first_lookup_us']:9.1f}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5, help="cold loads per format (default 5)")
+    ap.add_argument("--csv", type=Path, default=oui_lookup.CSV_PATH)
+    ap.add_argument("--format", action="append", choices=list(LOADERS),
+                    help="format to profile; repeatable (default: all)")
+    ap.add_argument("--json", type=Path, help="also write the results as JSON")
+    ap.add_argument("--child", nargs=3, metavar=("FORMAT", "PATH", "MAC"), help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.child:
+        fmt, path, mac = args.child
+        print(json.dumps(run_format(fmt, Path(path), int(mac))))
+        return 0
+
+    # Probe with an MA-L assignment, which every format resolves at the last level.
+    first = next(e for e in oui_lookup.read_rows(args.csv) if e.prefix_bits == 24)
+    mac = int(first.prefix, 16) << 24 | 0x123456
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = prepare(args.csv, Path(workdir))
+        for fmt in args.format or list(LOADERS):
+            results.append(profile(fmt, paths[fmt], mac, args.runs))
+
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps({"runs": args.runs, "probe": f"{mac:012X}", "results": results},
+                                        indent=2))
+        print(f"wrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
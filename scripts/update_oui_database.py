@@ -3,17 +3,39 @@
 
 Downloads MA-L (24-bit), MA-M (28-bit), and MA-S (36-bit) assignment
 listings and merges them into the unified format the FDK app loads at
-startup. Run whenever a scanned MAC's OUI resolves to "Unknown" because
-the bundled snapshot predates that assignment.
+startup, then rewrites its companion files and mac_unified.manifest.json.
+Run whenever a scanned MAC's OUI resolves to "Unknown" because the bundled
+snapshot predates that assignment. Caching, offline sources, deltas and
+the optional extra outputs are described in --help.
 
     python3 scripts/update_oui_database.py
 """
 
+import argparse
 import csv
+import gzip
+import hashlib
+import heapq
 import io
+import json
+import lzma
+import os
+import re
+import shutil
 import sys
+import tarfile
+import tempfile
+import time
+import tracemalloc
+import urllib.error
+import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple, Union
+
+import oui_lookup
 
 SOURCES = [
     ("https://standards-oui.ieee.org/oui/oui.csv", "MA-L", 24),
@@ -22,16 +44,175 @@ SOURCES = [
 ]
 
 OUT_PATH = Path(__file__).resolve().parent.parent / "assets" / "mac_unified.csv"
+BIN_OUT_PATH = OUT_PATH.with_suffix(".bin")
+VENDOR_INDEX_OUT_PATH = OUT_PATH.with_name("mac_unified.vendors.bin")
+CANONICAL_OUT_PATH = OUT_PATH.with_name("mac_unified.canonical.csv")
+MANIFEST_PATH = OUT_PATH.with_name("mac_unified.manifest.json")
+
+HEADER = oui_lookup.CSV_HEADER
+DELTA_FORMAT = "fdk-oui-delta/1"
+MANIFEST_FORMAT = "fdk-oui-manifest/1"
+
+MAX_WORKERS = 3
+USER_AGENT = "FDK-OUI-Update/1.0"
+
+
+class Fetched(NamedTuple):
+    url: str
+    registry: str
+    bits: int
+    spool: TextIO
+    count: int
+    resorted: bool
+    status: str
+    sha256: str
+    seconds: float
 
 
-def fetch(url: str) -> str:
-    req = urllib.request.Request(url, headers={"User-Agent": "FDK-OUI-Update/1.0"})
+@contextmanager
+def fetch(url: str) -> Iterator[BinaryIO]:
+    """Open ``url``; the body is read off the socket only as it is consumed."""
+    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
     with urllib.request.urlopen(req, timeout=60) as resp:
-        return resp.read().decode("utf-8", errors="replace")
+        yield resp
+
+
+def source_name(url: str) -> str:
+    return urllib.parse.urlsplit(url).path.rsplit("/", 1)[-1]
+
+
+class LocalRegistries:
+    """Registry CSVs from a directory or tarball, checked against its SHA256SUMS.
+
+    Files are matched to SOURCES by URL basename (oui.csv, mam.csv,
+    oui36.csv); tarball members may sit in any subdirectory.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with self._member("SHA256SUMS") as fh:
+            listing = fh.read().decode("utf-8")
+        self.checksums = {}
+        for line in listing.splitlines():
+            if line.strip():
+                digest, name = line.split(None, 1)
+                self.checksums[name.strip().lstrip("*").rsplit("/", 1)[-1]] = digest.lower()
+
+    @contextmanager
+    def _member(self, name: str) -> Iterator[BinaryIO]:
+        if self.path.is_dir():
+            target = self.path / name
+            if not target.is_file():
+                raise SystemExit(f"{name} not found in {self.path}")
+            with target.open("rb") as fh:
+                yield fh
+            return
+        # One TarFile per open keeps concurrent workers off a shared handle.
+        with tarfile.open(self.path) as tar:
+            member = next((m for m in tar.getmembers()
+                           if m.isfile() and m.name.rsplit("/", 1)[-1] == name), None)
+            if member is None:
+                raise SystemExit(f"{name} not found in {self.path}")
+            with tar.extractfile(member) as fh:
+                yield fh
+
+    def open(self, url: str):
+        name = source_name(url)
+        if name not in self.checksums:
+            raise SystemExit(f"{name} is not listed in {self.path} SHA256SUMS")
+        return self._member(name)
+
+    def verify(self, url: str, digest: str) -> None:
+        name = source_name(url)
+        if self.checksums[name] != digest:
+            raise SystemExit(f"checksum mismatch for {name}: {digest} != {self.checksums[name]}")
+
+
+class _HashingReader(io.RawIOBase):
+    """Pass-through reader that feeds every byte it reads into SHA-256."""
+
+    def __init__(self, raw: BinaryIO):
+        self._raw = raw
+        self.sha256 = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
 
+    def readinto(self, buffer) -> int:
+        n = self._raw.readinto(buffer)
+        if n:
+            self.sha256.update(memoryview(buffer)[:n])
+        return n
 
-def parse(body: str, registry: str, bits: int):
-    reader = csv.reader(io.StringIO(body))
+
+def fetch_cached(url: str, cache_dir: Path) -> Tuple[Path, str]:
+    """Mirror ``url`` into ``cache_dir`` using conditional and ranged requests.
+
+    The ETag / Last-Modified of the last response are kept next to the body.
+    A complete copy is revalidated with If-None-Match / If-Modified-Since; a
+    ``.part`` file left by an interrupted transfer is resumed with Range +
+    If-Range; one that already holds the whole body (416 with a matching
+    ``Content-Range: bytes */N``) is promoted as is. Returns the local copy
+    and "not modified", "resumed" or "downloaded".
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    name = re.sub(r"[^A-Za-z0-9.]+", "_", url)
+    body = cache_dir / name
+    part = cache_dir / f"{name}.part"
+    meta_path = cache_dir / f"{name}.json"
+    meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+
+    headers = {"User-Agent": USER_AGENT}
+    offset = part.stat().st_size if part.exists() else 0
+    validator = meta.get("etag") or meta.get("last_modified")
+    if offset and validator:
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = validator
+    elif body.exists():
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        resp = urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=60)
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304 and body.exists():
+            return body, "not modified"
+        if exc.code == 416 and offset:
+            # The run that wrote .part died before promoting it: if the server
+            # says it is the whole body, keep it, otherwise start over.
+            total = exc.headers.get("Content-Range", "").rpartition("/")[2]
+            if total == str(offset):
+                part.replace(body)
+                return body, "resumed"
+            part.unlink()
+            return fetch_cached(url, cache_dir)
+        raise
+    with resp:
+        resumed = resp.status == 206
+        if resumed and not resp.headers.get("Content-Range", "").startswith(f"bytes {offset}-"):
+            part.unlink()
+            raise SystemExit(f"unexpected Content-Range from {url}: {resp.headers.get('Content-Range')}")
+        # Validators go to disk before the body so an interrupted transfer can resume.
+        meta = {
+            "url": url,
+            "etag": resp.headers.get("ETag") or (meta.get("etag") if resumed else None),
+            "last_modified": resp.headers.get("Last-Modified") or (meta.get("last_modified") if resumed else None),
+        }
+        meta_path.write_text(json.dumps(meta, indent=2))
+        with part.open("ab" if resumed else "wb") as fh:
+            shutil.copyfileobj(resp, fh, 1 << 16)
+        length = resp.headers.get("Content-Length")
+    if length is not None and part.stat().st_size != (offset if resumed else 0) + int(length):
+        raise SystemExit(f"incomplete download of {url}; rerun to resume from {part}")
+    part.replace(body)
+    return body, "resumed" if resumed else "downloaded"
+
+
+def parse(body: Union[str, Iterable[str]], registry: str, bits: int):
+    """Yield unified rows from a registry body, given as a str or line stream."""
+    reader = csv.reader(io.StringIO(body) if isinstance(body, str) else body)
     header = next(reader, None)
     if not header or header[:3] != ["Registry", "Assignment", "Organization Name"]:
         raise SystemExit(f"unexpected header for {registry}: {header}")
@@ -44,23 +225,391 @@ def parse(body: str, registry: str, bits: int):
         yield assignment, str(bits), name, registry, reserved
 
 
-def main() -> int:
-    rows = []
-    for url, registry, bits in SOURCES:
-        print(f"fetching {registry} from {url}")
-        body = fetch(url)
-        before = len(rows)
-        rows.extend(parse(body, registry, bits))
-        print(f"  -> {len(rows) - before} entries")
+def row_key(row):
+    return row[0], int(row[1])
+
+
+def spool_sorted(rows: Iterable) -> Tuple[TextIO, int, bool]:
+    """Spill one registry's rows to an anonymous temp file in sorted order.
+
+    IEEE listings are already close to assignment order, so rows stream
+    straight to the spool while their order is checked; only when the
+    check fails is the spool read back, sorted and rewritten. Returns the
+    rewound spool, the row count and whether a sort was needed.
+    """
+    spool = tempfile.TemporaryFile("w+", newline="", encoding="utf-8")
+    writer = csv.writer(spool, lineterminator="\n")
+    count, last, needs_sort = 0, None, False
+    for row in rows:
+        key = row_key(row)
+        if last is not None and last > key:
+            needs_sort = True
+        last = key
+        writer.writerow(row)
+        count += 1
+    if needs_sort:
+        spool.seek(0)
+        ordered = sorted(csv.reader(spool), key=row_key)
+        spool.seek(0)
+        spool.truncate()
+        writer.writerows(ordered)
+    spool.seek(0)
+    return spool, count, needs_sort
+
+
+def merge_sorted(spools: Iterable[TextIO]):
+    """k-way merge of per-source spools into the unified (prefix, bits) order."""
+    return heapq.merge(*(csv.reader(spool) for spool in spools), key=row_key)
+
+
+@contextmanager
+def open_source(url: str, cache_dir: Optional[Path] = None,
+                local: Optional[LocalRegistries] = None) -> Iterator[Tuple[BinaryIO, str]]:
+    if local is not None:
+        with local.open(url) as raw:
+            yield raw, "local"
+    elif cache_dir is not None:
+        path, status = fetch_cached(url, cache_dir)
+        with path.open("rb") as raw:
+            yield raw, status
+    else:
+        with fetch(url) as raw:
+            yield raw, "downloaded"
+
+
+def fetch_all(sources=SOURCES, max_workers: int = MAX_WORKERS, cache_dir: Optional[Path] = None,
+              local: Optional[LocalRegistries] = None) -> List[Fetched]:
+    """Download every source concurrently.
+
+    Each response is decoded and parsed as it streams in and its rows are
+    spilled to disk as they arrive, so the response body is never kept and
+    a registry is only held in memory if it arrives out of order and has to
+    be sorted; the raw bytes are hashed on the way through. With
+    ``cache_dir`` the registries are mirrored through fetch_cached first,
+    and with ``local`` they are read from (and verified against) local
+    copies instead. Results come back in ``sources`` order regardless of
+    completion order, so the merged output stays deterministic.
+    """
+
+    def timed(url: str, registry: str, bits: int) -> Fetched:
+        start = time.perf_counter()
+        with open_source(url, cache_dir, local) as (raw, status):
+            hashing = _HashingReader(raw)
+            stream = io.TextIOWrapper(io.BufferedReader(hashing), encoding="utf-8",
+                                      errors="replace", newline="")
+            spooled = spool_sorted(parse(stream, registry, bits))
+            stream.read()
+        digest = hashing.sha256.hexdigest()
+        if local is not None:
+            local.verify(url, digest)
+        return Fetched(url, registry, bits, *spooled, status, digest, time.perf_counter() - start)
 
-    rows.sort(key=lambda r: (r[0], int(r[1])))
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sources)))) as pool:
+        futures = [pool.submit(timed, *source) for source in sources]
+        return [future.result() for future in futures]
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUT_PATH.open("w", newline="", encoding="utf-8") as fh:
+
+def write_csv(rows: Iterable, path: Path) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with path.open("w", newline="", encoding="utf-8") as fh:
         writer = csv.writer(fh, quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
-        writer.writerow(["prefix", "prefix_bits", "manufacturer", "registry_type", "is_ieee_reserved"])
-        writer.writerows(rows)
-    print(f"wrote {len(rows)} entries to {OUT_PATH}")
+        writer.writerow(HEADER)
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+    return written
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _keyed(path: Path) -> Dict[str, List[List[str]]]:
+    """Group a unified CSV by "PREFIX/bits"; duplicate assignments keep file order."""
+    table = {}
+    with path.open(newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        next(reader, None)
+        for row in reader:
+            table.setdefault(f"{row[0]}/{row[1]}", []).append(row[2:])
+    return table
+
+
+def _delta_key(key: str):
+    prefix, bits = key.split("/")
+    return prefix, int(bits)
+
+
+def make_delta(old_path: Path, new_path: Path) -> dict:
+    """Diff two unified CSV snapshots keyed by (prefix, prefix_bits)."""
+    old, new = _keyed(old_path), _keyed(new_path)
+    return {
+        "format": DELTA_FORMAT,
+        "from_sha256": file_sha256(old_path),
+        "to_sha256": file_sha256(new_path),
+        "added": {k: v for k, v in new.items() if k not in old},
+        "removed": sorted((k for k in old if k not in new), key=_delta_key),
+        "renamed": {k: v for k, v in new.items() if k in old and old[k] != v},
+    }
+
+
+def apply_delta(old_path: Path, delta: dict, out_path: Path) -> int:
+    """Rebuild the new snapshot from ``old_path`` and a make_delta() patch.
+
+    Both ends are checked against the hashes in the patch. The result is
+    written beside ``out_path`` and only moved into place once it matches,
+    so ``out_path`` may be ``old_path`` itself.
+    """
+    if delta.get("format") != DELTA_FORMAT:
+        raise SystemExit(f"unsupported delta format: {delta.get('format')}")
+    if file_sha256(old_path) != delta["from_sha256"]:
+        raise SystemExit(f"{old_path} does not match the delta's base snapshot")
+    table = _keyed(old_path)
+    for key in delta["removed"]:
+        del table[key]
+    table.update(delta["added"])
+    table.update(delta["renamed"])
+    rows = (
+        key.split("/") + value
+        for key in sorted(table, key=_delta_key)
+        for value in table[key]
+    )
+    partial = out_path.with_name(f".{out_path.name}.partial")
+    try:
+        written = write_csv(rows, partial)
+        if file_sha256(partial) != delta["to_sha256"]:
+            raise SystemExit(f"patched {out_path} does not match the delta's target hash")
+        partial.replace(out_path)
+    finally:
+        partial.unlink(missing_ok=True)
+    return written
+
+
+def write_companions(csv_path: Path) -> List[Path]:
+    """Rewrite the files always shipped next to the CSV; returns their paths."""
+    rows = list(oui_lookup.read_rows(csv_path))
+    count = oui_lookup.write_binary(rows, BIN_OUT_PATH)
+    print(f"wrote {count} entries ({BIN_OUT_PATH.stat().st_size} bytes) to {BIN_OUT_PATH}")
+    vendors = oui_lookup.VendorIndex.from_rows(rows)
+    grams = vendors.write(VENDOR_INDEX_OUT_PATH)
+    print(f"wrote vendor index ({len(vendors.names)} manufacturers, {grams} trigrams) to {VENDOR_INDEX_OUT_PATH}")
+    count, canonical = oui_lookup.write_canonical(rows, CANONICAL_OUT_PATH)
+    print(f"wrote {canonical} canonical vendors for {count} entries to {CANONICAL_OUT_PATH}")
+    return [BIN_OUT_PATH, VENDOR_INDEX_OUT_PATH, CANONICAL_OUT_PATH]
+
+
+def manifest_sources(fetched: List[Fetched]) -> List[dict]:
+    return [
+        {"registry": f.registry, "file": source_name(f.url), "url": f.url,
+         "entries": f.count, "sha256": f.sha256}
+        for f in fetched
+    ]
+
+
+def write_manifest(path: Path, csv_path: Path, sources: List[dict], outputs: List[Path]) -> str:
+    """Write the content-hash manifest; returns the unified CSV's SHA-256."""
+    content = file_sha256(csv_path)
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "content_sha256": content,
+        "sources": sources,
+        "outputs": {
+            Path(os.path.relpath(out, path.parent)).as_posix(): {
+                "bytes": out.stat().st_size, "sha256": file_sha256(out),
+            }
+            for out in outputs
+        },
+    }
+    path.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    return content
+
+
+def measure_load(load) -> Tuple[float, int]:
+    """Best-of-3 seconds for ``list(load())`` and the bytes the list retains."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        list(load())
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    loaded = list(load())
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del loaded
+    return best, retained
+
+
+def write_compressed(csv_path: Path, out_path: Path) -> int:
+    """Write a .gz or .xz copy of the CSV; returns its size in bytes.
+
+    gzip gets mtime 0 and no embedded name, so identical tables compress to
+    identical bytes.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with csv_path.open("rb") as src, out_path.open("wb") as raw:
+        if out_path.suffix == ".gz":
+            dst = gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=9, mtime=0)
+        elif out_path.suffix == ".xz":
+            dst = lzma.LZMAFile(raw, "wb", preset=9 | lzma.PRESET_EXTREME)
+        else:
+            raise SystemExit(f"{out_path}: compressed output must end in .gz or .xz")
+        with dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+    return out_path.stat().st_size
+
+
+def report_compressed(csv_path: Path, paths: List[Path]) -> None:
+    csv_size = csv_path.stat().st_size
+    csv_time, _ = measure_load(lambda: oui_lookup.read_rows(csv_path))
+    print(f"  {'file':24s} {'bytes':>9s} {'ratio':>6s} {'inflate ms':>10s} {'+parse ms':>9s}")
+    print(f"  {csv_path.name:24s} {csv_size:9d} {1:6.2f} {0:10.0f} {csv_time * 1000:9.0f}")
+    for path in paths:
+        size = path.stat().st_size
+        opener = oui_lookup.COMPRESSED_OPENERS[path.suffix]
+        inflate = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            with opener(path, "rb") as fh:
+                while fh.read(1 << 20):
+                    pass
+            inflate = min(inflate, time.perf_counter() - start)
+        total, _ = measure_load(lambda: oui_lookup.read_rows(path))
+        print(f"  {path.name:24s} {size:9d} {csv_size / size:6.2f} {inflate * 1000:10.0f} {total * 1000:9.0f}")
+
+
+def report_dict_encoded(csv_path: Path, dict_path: Path) -> None:
+    csv_size, dict_size = csv_path.stat().st_size, dict_path.stat().st_size
+    csv_time, csv_mem = measure_load(lambda: oui_lookup.read_rows(csv_path))
+    dict_time, dict_mem = measure_load(lambda: oui_lookup.read_dict_rows(dict_path))
+    print(f"  size:  {dict_size} vs {csv_size} bytes ({100 * dict_size / csv_size:.0f}% of CSV)")
+    print(f"  parse: {dict_time * 1000:.0f} vs {csv_time * 1000:.0f} ms")
+    print(f"  rows in memory: {dict_mem / 1e6:.1f} vs {csv_mem / 1e6:.1f} MB")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--jobs", type=int, default=MAX_WORKERS,
+                    help=f"parallel registry downloads (default {MAX_WORKERS})")
+    sources = ap.add_mutually_exclusive_group()
+    sources.add_argument("--cache-dir", type=Path,
+                         help="keep registry copies here and only re-download changed ones")
+    sources.add_argument("--source", type=Path, metavar="DIR|TARBALL",
+                         help="read registry copies (checked against their SHA256SUMS) instead of downloading")
+    ap.add_argument("--delta-out", type=Path,
+                    help="write a patch from the previous mac_unified.csv to the new one")
+    ap.add_argument("--dict-out", type=Path,
+                    help="also write a dictionary-encoded copy and report its savings")
+    ap.add_argument("--bitmap-out", type=Path,
+                    help="also write the 24-bit known-OUI bitmap")
+    ap.add_argument("--shards-out", type=Path,
+                    help="also write per-first-byte shards and their manifest to this directory")
+    ap.add_argument("--flat-out", type=Path,
+                    help="also write the flattened single-probe table and verify it")
+    ap.add_argument("--gzip-out", type=Path,
+                    help="also write a gzip-compressed copy (.gz) and report its decode cost")
+    ap.add_argument("--xz-out", type=Path,
+                    help="also write an lzma-compressed copy (.xz) and report its decode cost")
+    ap.add_argument("--apply-delta", type=Path,
+                    help="apply a --delta-out patch to mac_unified.csv and exit")
+    args = ap.parse_args(argv)
+    if args.gzip_out and args.gzip_out.suffix != ".gz":
+        ap.error("--gzip-out must end in .gz")
+    if args.xz_out and args.xz_out.suffix != ".xz":
+        ap.error("--xz-out must end in .xz")
+
+    if args.apply_delta:
+        delta = json.loads(args.apply_delta.read_text())
+        if file_sha256(OUT_PATH) == delta["to_sha256"]:
+            print(f"{OUT_PATH} already matches {delta['to_sha256'][:12]}")
+            return 0
+        # A patch carries no registry copies, so the previous sources stand.
+        sources = []
+        if MANIFEST_PATH.exists():
+            sources = json.loads(MANIFEST_PATH.read_text()).get("sources", [])
+        count = apply_delta(OUT_PATH, delta, OUT_PATH)
+        outputs = [OUT_PATH] + write_companions(OUT_PATH)
+        print(f"patched {OUT_PATH} to {count} entries ({delta['to_sha256'][:12]})")
+        content = write_manifest(MANIFEST_PATH, OUT_PATH, sources, outputs)
+        print(f"wrote manifest to {MANIFEST_PATH} (content {content[:12]})")
+        return 0
+
+    # The scratch copy is removed on cleanup() or, if the run fails, at exit.
+    scratch = previous = None
+    if args.delta_out and OUT_PATH.exists():
+        scratch = tempfile.TemporaryDirectory()
+        previous = Path(scratch.name) / OUT_PATH.name
+        shutil.copyfile(OUT_PATH, previous)
+
+    local = LocalRegistries(args.source) if args.source else None
+    origin = f"from {args.source}" if local else f"({args.jobs} at a time)"
+    print(f"fetching {len(SOURCES)} registries {origin}")
+    start = time.perf_counter()
+    fetched = fetch_all(SOURCES, args.jobs, args.cache_dir, local)
+    spools = []
+    for result in fetched:
+        spools.append(result.spool)
+        order = "re-sorted" if result.resorted else "in order"
+        print(f"  {result.registry}: {result.count} entries ({order}), {result.status}"
+              f" in {result.seconds:.2f}s from {result.url}")
+    print(f"  fetched in {time.perf_counter() - start:.2f}s")
+
+    written = write_csv(merge_sorted(spools), OUT_PATH)
+    for spool in spools:
+        spool.close()
+    print(f"wrote {written} entries to {OUT_PATH}")
+    outputs = [OUT_PATH] + write_companions(OUT_PATH)
+    if args.dict_out:
+        count, names = oui_lookup.write_dict_encoded(oui_lookup.read_rows(OUT_PATH), args.dict_out)
+        print(f"wrote {count} entries / {names} manufacturers to {args.dict_out}")
+        report_dict_encoded(OUT_PATH, args.dict_out)
+        outputs.append(args.dict_out)
+    if args.bitmap_out:
+        flagged = oui_lookup.write_bitmap(oui_lookup.read_rows(OUT_PATH), args.bitmap_out)
+        print(f"wrote bitmap with {flagged} known OUIs to {args.bitmap_out}")
+        outputs.append(args.bitmap_out)
+    if args.shards_out:
+        manifest = oui_lookup.write_shards(oui_lookup.read_rows(OUT_PATH), args.shards_out)
+        largest = max(shard["rows"] for shard in manifest["shards"].values())
+        print(f"wrote {len(manifest['shards'])} shards (largest {largest} entries) to {args.shards_out}")
+        outputs.append(args.shards_out / "manifest.json")
+    if args.flat_out:
+        runs = oui_lookup.write_flat(oui_lookup.read_rows(OUT_PATH), args.flat_out)
+        with oui_lookup.MappedOUITable(args.flat_out) as flat:
+            checked = oui_lookup.verify_flat(flat, oui_lookup.OUITable.from_csv(OUT_PATH))
+        print(f"wrote {runs} flattened runs to {args.flat_out} (verified at {checked} block boundaries)")
+        outputs.append(args.flat_out)
+    compressed = []
+    for path in (args.gzip_out, args.xz_out):
+        if path:
+            size = write_compressed(OUT_PATH, path)
+            print(f"wrote {size} bytes to {path}")
+            compressed.append(path)
+    if compressed:
+        report_compressed(OUT_PATH, compressed)
+        outputs.extend(compressed)
+
+    if args.delta_out and previous is None:
+        print(f"no previous {OUT_PATH.name}; skipping delta")
+    elif args.delta_out:
+        try:
+            delta = make_delta(previous, OUT_PATH)
+            # Round-trip check: the patch must rebuild the new snapshot exactly.
+            apply_delta(previous, delta, previous.with_name("roundtrip.csv"))
+        finally:
+            scratch.cleanup()
+        args.delta_out.parent.mkdir(parents=True, exist_ok=True)
+        args.delta_out.write_text(json.dumps(delta, separators=(",", ":"), sort_keys=True))
+        print(f"wrote delta to {args.delta_out} ({args.delta_out.stat().st_size} bytes):"
+              f" +{len(delta['added'])} -{len(delta['removed'])} ~{len(delta['renamed'])}")
+        outputs.append(args.delta_out)
+
+    content = write_manifest(MANIFEST_PATH, OUT_PATH, manifest_sources(fetched), outputs)
+    print(f"wrote manifest to {MANIFEST_PATH} (content {content[:12]})")
     return 0
 
 
@@ -7,7 +7,11 @@ Tests cache hit rates, TTL behavior, and memory usage
 import time
 import json
 import hashlib
-from typing import Dict, Any, Optional, Tuple, List
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Any, FrozenSet, Hashable, Optional, Tuple, List
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 import sys
@@ -15,12 +19,16 @@ import sys
 @dataclass
 class CacheEntry:
     """Represents a cache entry with data and metadata"""
-    key: str
+    key: Hashable
     data: Any
     size_bytes: int
     created_at: datetime
     ttl_seconds: int
     hit_count: int = 0
+    endpoint: str = ''
+    params: Optional[Dict[str, Any]] = None
+    sizer: str = ''
+    sized_with: Optional['Sizer'] = None  # sizer passed to set(), reused by refreshes
     
     def is_expired(self) -> bool:
         """Check if cache entry has expired"""
@@ -30,77 +38,392 @@ class CacheEntry:
     def age_seconds(self) -> float:
         """Get age of cache entry in seconds"""
         return (datetime.now() - self.created_at).total_seconds()
+    
+    def is_stale(self, grace_seconds: float) -> bool:
+        """Check if cache entry has expired but is still within grace_seconds of its TTL"""
+        return self.ttl_seconds < self.age_seconds() <= self.ttl_seconds + grace_seconds
+
+class Sizer(ABC):
+    """Estimates how many bytes a cached payload costs"""
+    name = 'sizer'
+    
+    @abstractmethod
+    def size(self, data: Any) -> int:
+        """Size of data in bytes"""
+    
+    def measure(self, data: Any) -> Tuple[int, str]:
+        """Return (size in bytes, name of the sizer that produced it)"""
+        return self.size(data), self.name
+
+class JsonSizer(Sizer):
+    """Exact size of the payload serialized as JSON (the original behaviour)"""
+    name = 'json'
+    
+    def size(self, data: Any) -> int:
+        return len(json.dumps(data).encode('utf-8'))
+
+class ByteLengthSizer(Sizer):
+    """Length of an already-serialized body; other payloads go to the fallback"""
+    name = 'bytes'
+    
+    def __init__(self, fallback: Optional[Sizer] = None):
+        self.fallback = fallback or JsonSizer()
+    
+    def size(self, data: Any) -> int:
+        if isinstance(data, (bytes, bytearray)):
+            return len(data)
+        if isinstance(data, memoryview):
+            return data.nbytes
+        if not isinstance(data, str):
+            return self.fallback.size(data)
+        # ASCII text is one byte per character, no need to encode it
+        return len(data) if data.isascii() else len(data.encode('utf-8'))
+    
+    def measure(self, data: Any) -> Tuple[int, str]:
+        if isinstance(data, (bytes, bytearray, memoryview, str)):
+            return self.size(data), self.name
+        return self.fallback.measure(data)
+
+class SamplingSizer(Sizer):
+    """JSON size estimated from a sample of each large list
+    
+    Lists longer than sample_size are assumed homogeneous: an evenly spaced
+    sample is serialized and its average item size is scaled up. Dicts are
+    walked so a large list nested under a response envelope is sampled too.
+    """
+    name = 'sampling'
+    
+    def __init__(self, sample_size: int = 32):
+        self.sample_size = sample_size
+    
+    def size(self, data: Any) -> int:
+        if isinstance(data, dict):
+            # '{' + '}' plus '"key": ' and ', ' per item
+            total = 2 + max(len(data) - 1, 0) * 2
+            for key, value in data.items():
+                total += len(json.dumps(str(key)).encode('utf-8')) + 2 + self.size(value)
+            return total
+        if isinstance(data, list) and len(data) > self.sample_size:
+            step = len(data) / self.sample_size
+            sample = [data[int(i * step)] for i in range(self.sample_size)]
+            # Sample list without its brackets and separators, per item
+            per_item = (len(json.dumps(sample).encode('utf-8')) - 2 - (self.sample_size - 1) * 2) / self.sample_size
+            return int(2 + (len(data) - 1) * 2 + per_item * len(data))
+        return len(json.dumps(data).encode('utf-8'))
+
+class DeepSizer(Sizer):
+    """In-memory footprint: sys.getsizeof over every reachable object, once each"""
+    name = 'deep'
+    
+    def size(self, data: Any) -> int:
+        seen = set()
+        total = 0
+        stack = [data]
+        while stack:
+            obj = stack.pop()
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            total += sys.getsizeof(obj)
+            if isinstance(obj, dict):
+                stack.extend(obj.keys())
+                stack.extend(obj.values())
+            elif isinstance(obj, (list, tuple, set, frozenset)):
+                stack.extend(obj)
+        return total
+
+# Parameter value types that are already valid, unambiguous key parts
+_PLAIN_TYPES = frozenset((str, int, type(None)))
+
+def _freeze(value: Any) -> Hashable:
+    """Hashable stand-in for a request parameter value"""
+    kind = type(value)
+    if kind in _PLAIN_TYPES:
+        return value
+    if kind is dict:
+        return ('dict', tuple(sorted((k, _freeze(v)) for k, v in value.items())))
+    if kind is list or kind is tuple:
+        return ('list', tuple(_freeze(v) for v in value))
+    # Tag the rest so 1, 1.0 and True stay distinct keys, as they are in JSON
+    return (kind.__name__, value)
+
+# Response keys that hold the record list of an enveloped response
+ENVELOPE_KEYS = ('data', 'results')
+
+def field_names(params: Dict[str, Any]) -> List[str]:
+    """Fields requested with `only`, in request order (empty for full records)"""
+    only = params.get('only') or ()
+    names = only.split(',') if isinstance(only, str) else only
+    return [name.strip() for name in names if name.strip()]
+
+def only_fields(params: Dict[str, Any]) -> Optional[FrozenSet[str]]:
+    """Field set requested with `only`, or None for full records"""
+    names = field_names(params)
+    return frozenset(names) if names else None
+
+def project_fields(data: Any, fields: FrozenSet[str]) -> Any:
+    """Cut a response down to the requested fields
+    
+    Handles a bare record list, a single record, or an envelope whose
+    ENVELOPE_KEYS hold the record list (other envelope keys are kept).
+    """
+    if isinstance(data, list):
+        return [project_fields(item, fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    if any(isinstance(data.get(key), list) for key in ENVELOPE_KEYS):
+        return {key: project_fields(value, fields) if key in ENVELOPE_KEYS else value
+                for key, value in data.items()}
+    return {key: value for key, value in data.items() if key in fields}
 
 class CacheService:
     """
     Cache service implementation following Clean Architecture
     This would be injected into Repository layer
+    
+    Entries are kept in least-recently-used order (oldest first) and the
+    total size is tracked as entries come and go, so get, set and eviction
+    are all O(1).
+    
+    Requests that differ only in their `only` field list are grouped by
+    endpoint and filters, so a cached wider projection answers a narrower
+    request and a new wider response replaces the narrower ones it covers.
+    
+    With a refresher (the API call, as refresher(endpoint, params)), entries
+    are served stale-while-revalidate: an expired entry still inside its
+    endpoint's grace window is returned at once while a background worker
+    refetches it, so TTL expiry never blocks the user's path.
     """
     
-    def __init__(self, max_size_mb: int = 10):
-        self.cache: Dict[str, CacheEntry] = {}
+    def __init__(self, max_size_mb: int = 10, sizer: Optional[Sizer] = None,
+                 projector: Callable[[Any, FrozenSet[str]], Any] = project_fields,
+                 refresher: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+                 grace_seconds: Optional[Dict[str, float]] = None,
+                 default_grace_seconds: float = 0, refresh_workers: int = 2):
+        self.refresher = refresher
+        self.grace_seconds = dict(grace_seconds or {})
+        self.default_grace_seconds = default_grace_seconds
+        self.refresh_workers = refresh_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # key -> (entry the refresh was scheduled for, its future)
+        self._refreshing: Dict[Hashable, Tuple[CacheEntry, Future]] = {}
+        # Refresh workers write back from their own threads
+        self._lock = threading.RLock()
+        self.sizer = sizer or JsonSizer()
+        self.projector = projector
+        # endpoint+filters key -> {field set (None = all fields): cache key}
+        self.projections: Dict[Tuple, Dict[Optional[FrozenSet[str]], Tuple]] = {}
+        # endpoint+filters key -> every field the app's screens request, in order
+        self.known_fields: Dict[Tuple, Dict[str, None]] = {}
+        self.sizer_counts: Counter = Counter()
+        self.cache: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
         self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.current_size_bytes = 0
         self.stats = {
             'hits': 0,
             'misses': 0,
+            'fresh_hits': 0,
+            'stale_hits': 0,
+            'projection_hits': 0,
+            'refreshes': 0,
+            'refresh_failures': 0,
             'evictions': 0,
             'total_requests': 0
         }
     
-    def _generate_key(self, endpoint: str, params: Dict[str, Any]) -> str:
-        """Generate cache key from endpoint and parameters"""
+    def _generate_key(self, endpoint: str, params: Dict[str, Any]) -> Tuple:
+        """Generate cache key from endpoint and parameters
+        
+        A plain tuple of the endpoint and the sorted, frozen params: hashing
+        it is all a lookup costs, with no JSON or MD5 on the hot path.
+        """
+        items = sorted(params.items())
+        for _, value in items:
+            if type(value) not in _PLAIN_TYPES:
+                return (endpoint, tuple((k, _freeze(v)) for k, v in items))
+        return (endpoint, tuple(items))
+    
+    @staticmethod
+    def persistent_key(endpoint: str, params: Dict[str, Any]) -> str:
+        """Stable string digest of a request, for keys stored outside the process"""
         # Sort params for consistent key generation
         sorted_params = sorted(params.items())
         key_string = f"{endpoint}:{json.dumps(sorted_params)}"
         return hashlib.md5(key_string.encode()).hexdigest()
     
-    def _calculate_size(self, data: Any) -> int:
-        """Calculate approximate size of data in bytes"""
-        return len(json.dumps(data).encode('utf-8'))
+    def _calculate_size(self, data: Any, sizer: Optional[Sizer] = None) -> Tuple[int, str]:
+        """Calculate approximate size of data in bytes, and which sizer did it"""
+        size, used = (sizer or self.sizer).measure(data)
+        self.sizer_counts[used] += 1
+        return size, used
+    
+    def _projection_key(self, endpoint: str, params: Dict[str, Any]) -> Tuple[Tuple, Optional[FrozenSet[str]]]:
+        """Split a request into its endpoint+filters key and its field set"""
+        filters = {k: v for k, v in params.items() if k != 'only'}
+        return self._generate_key(endpoint, filters), only_fields(params)
+    
+    def _unregister(self, entry: CacheEntry) -> None:
+        """Forget an entry's projection once it leaves the cache"""
+        base_key, fields = self._projection_key(entry.endpoint, entry.params)
+        siblings = self.projections.get(base_key)
+        if siblings and siblings.get(fields) == entry.key:
+            del siblings[fields]
+            if not siblings:
+                del self.projections[base_key]
+    
+    def _remove(self, key: Hashable) -> CacheEntry:
+        """Drop an entry and release its bytes"""
+        entry = self.cache.pop(key)
+        self.current_size_bytes -= entry.size_bytes
+        self._unregister(entry)
+        return entry
     
     def _evict_if_needed(self, required_size: int) -> None:
-        """Evict old entries if cache is too large"""
-        current_size = sum(entry.size_bytes for entry in self.cache.values())
+        """Evict least recently used entries until required_size fits"""
+        while self.cache and self.current_size_bytes + required_size > self.max_size_bytes:
+            _, entry = self.cache.popitem(last=False)
+            self.current_size_bytes -= entry.size_bytes
+            self._unregister(entry)
+            self.stats['evictions'] += 1
+    
+    def grace_for(self, endpoint: str) -> float:
+        """Seconds past its TTL that an entry for endpoint may still be served"""
+        return self.grace_seconds.get(endpoint, self.default_grace_seconds)
+    
+    def _live_entry(self, key: Hashable) -> Tuple[Optional[CacheEntry], bool]:
+        """Entry for key if it can be served, marked most recently used
         
-        if current_size + required_size > self.max_size_bytes:
-            # Sort by age and evict oldest first
-            sorted_entries = sorted(
-                self.cache.items(),
-                key=lambda x: x[1].created_at
-            )
-            
-            while current_size + required_size > self.max_size_bytes and sorted_entries:
-                key_to_evict, entry_to_evict = sorted_entries.pop(0)
-                current_size -= entry_to_evict.size_bytes
-                del self.cache[key_to_evict]
-                self.stats['evictions'] += 1
+        Returns (entry, stale). A stale entry is past its TTL but inside its
+        grace window, and has a background refresh queued.
+        """
+        entry = self.cache.get(key)
+        if entry is None:
+            return None, False
+        stale = entry.is_expired()
+        if stale:
+            if self.refresher is None or not entry.is_stale(self.grace_for(entry.endpoint)):
+                # Expired, remove
+                self._remove(key)
+                return None, False
+            self._schedule_refresh(entry)
+        self.cache.move_to_end(key)
+        entry.hit_count += 1
+        return entry, stale
+    
+    def _count_hit(self, stale: bool) -> None:
+        self.stats['hits'] += 1
+        self.stats['stale_hits' if stale else 'fresh_hits'] += 1
+    
+    def _schedule_refresh(self, entry: CacheEntry) -> None:
+        """Queue a background refetch of a stale entry, at most one per key"""
+        if entry.key in self._refreshing:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.refresh_workers, thread_name_prefix='cache-refresh')
+        self._refreshing[entry.key] = (entry, self._executor.submit(self._refresh, entry))
+    
+    def _refresh(self, entry: CacheEntry) -> None:
+        """Worker body: refetch without holding the lock, then swap the entry in
+        
+        The result is dropped if the entry was cleared, evicted or replaced
+        by a newer set() while the fetch was in flight.
+        """
+        try:
+            data = self.refresher(entry.endpoint, entry.params)
+        except Exception:
+            # Keep serving the stale copy until its grace window runs out
+            with self._lock:
+                if self._finish_refresh(entry):
+                    self.stats['refresh_failures'] += 1
+            return
+        with self._lock:
+            if self._finish_refresh(entry) and self.cache.get(entry.key) is entry:
+                self._set(entry.endpoint, entry.params, data, entry.ttl_seconds, entry.sized_with)
+                self.stats['refreshes'] += 1
+    
+    def _finish_refresh(self, entry: CacheEntry) -> bool:
+        """Drop entry's refresh slot; False if clear() already dropped it"""
+        scheduled = self._refreshing.get(entry.key)
+        if scheduled is None or scheduled[0] is not entry:
+            return False
+        del self._refreshing[entry.key]
+        return True
+    
+    def wait_for_refreshes(self, timeout: Optional[float] = None) -> None:
+        """Block until the queued background refreshes have finished"""
+        with self._lock:
+            pending = [future for _, future in self._refreshing.values()]
+        wait(pending, timeout)
+    
+    def close(self) -> None:
+        """Stop the refresh workers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def register_projection(self, endpoint: str, params: Dict[str, Any]) -> None:
+        """Declare a field list that some screen requests for this endpoint and filters"""
+        base_key, fields = self._projection_key(endpoint, params)
+        if fields is not None:
+            self.known_fields.setdefault(base_key, {}).update(dict.fromkeys(field_names(params)))
+    
+    def fetch_params(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Params to send to the API after a miss
+        
+        `only` is widened to every field registered for the same endpoint
+        and filters, so one response can answer all of those screens.
+        """
+        base_key, fields = self._projection_key(endpoint, params)
+        known = self.known_fields.get(base_key)
+        if fields is None or not known or known.keys() <= fields:
+            return params
+        return {**params, 'only': ','.join(dict.fromkeys([*known, *field_names(params)]))}
     
     def get(self, endpoint: str, params: Dict[str, Any]) -> Optional[Any]:
-        """Get data from cache"""
-        self.stats['total_requests'] += 1
-        key = self._generate_key(endpoint, params)
+        """Get data from cache
         
-        if key in self.cache:
-            entry = self.cache[key]
-            
-            if entry.is_expired():
-                # Expired, remove and return None
-                del self.cache[key]
-                self.stats['misses'] += 1
-                return None
-            
-            # Valid cache hit
-            entry.hit_count += 1
-            self.stats['hits'] += 1
+        A request with an `only` field list is also answered by a cached
+        response for the same endpoint and filters whose field list covers
+        it (or that has all fields), projected down to the request.
+        """
+        with self._lock:
+            return self._get(endpoint, params)
+    
+    def _get(self, endpoint: str, params: Dict[str, Any]) -> Optional[Any]:
+        self.stats['total_requests'] += 1
+        entry, stale = self._live_entry(self._generate_key(endpoint, params))
+        if entry is not None:
+            self._count_hit(stale)
             return entry.data
         
+        base_key, fields = self._projection_key(endpoint, params)
+        if fields is not None:
+            for cached_fields, cached_key in list(self.projections.get(base_key, {}).items()):
+                if cached_fields is not None and not fields <= cached_fields:
+                    continue
+                entry, stale = self._live_entry(cached_key)
+                if entry is not None:
+                    self._count_hit(stale)
+                    self.stats['projection_hits'] += 1
+                    return self.projector(entry.data, fields)
+        
         self.stats['misses'] += 1
         return None
     
-    def set(self, endpoint: str, params: Dict[str, Any], data: Any, ttl_seconds: int = 300) -> None:
-        """Store data in cache"""
+    def set(self, endpoint: str, params: Dict[str, Any], data: Any, ttl_seconds: int = 300,
+            sizer: Optional[Sizer] = None) -> None:
+        """Store data in cache, sized by sizer or the cache's default sizer"""
+        with self._lock:
+            self._set(endpoint, params, data, ttl_seconds, sizer)
+    
+    def _set(self, endpoint: str, params: Dict[str, Any], data: Any, ttl_seconds: int,
+             sizer: Optional[Sizer] = None) -> None:
         key = self._generate_key(endpoint, params)
-        size = self._calculate_size(data)
+        size, used = self._calculate_size(data, sizer)
+        
+        # Replacing an entry frees its bytes first
+        if key in self.cache:
+            self._remove(key)
         
         # Evict if needed
         self._evict_if_needed(size)
@@ -112,129 +435,200 @@ class CacheService:
             size_bytes=size,
             created_at=datetime.now(),
             ttl_seconds=ttl_seconds,
-            hit_count=0
+            hit_count=0,
+            endpoint=endpoint,
+            params=params,
+            sizer=used,
+            sized_with=sizer
         )
+        self.current_size_bytes += size
+        
+        # Projections this response covers are now redundant
+        base_key, fields = self._projection_key(endpoint, params)
+        siblings = self.projections.setdefault(base_key, {})
+        for other_fields, other_key in list(siblings.items()):
+            if other_key != key and (fields is None or (other_fields is not None and other_fields <= fields)):
+                self._remove(other_key)
+        self.projections.setdefault(base_key, {})[fields] = key
     
     def clear(self) -> None:
         """Clear all cache entries"""
-        self.cache.clear()
-        self.stats = {
-            'hits': 0,
-            'misses': 0,
-            'evictions': 0,
-            'total_requests': 0
-        }
+        with self._lock:
+            # Queued refreshes are cancelled; running ones find their slot gone
+            for _, future in self._refreshing.values():
+                future.cancel()
+            self._refreshing.clear()
+            self.cache.clear()
+            self.projections.clear()
+            self.known_fields.clear()
+            self.current_size_bytes = 0
+            self.sizer_counts.clear()
+            self.stats = {
+                'hits': 0,
+                'misses': 0,
+                'fresh_hits': 0,
+                'stale_hits': 0,
+                'projection_hits': 0,
+                'refreshes': 0,
+                'refresh_failures': 0,
+                'evictions': 0,
+                'total_requests': 0
+            }
     
     def get_stats(self) -> Dict:
         """Get cache statistics"""
-        total_size = sum(entry.size_bytes for entry in self.cache.values())
+        with self._lock:
+            return self._get_stats()
+    
+    def _get_stats(self) -> Dict:
+        total_size = self.current_size_bytes
         hit_rate = self.stats['hits'] / self.stats['total_requests'] if self.stats['total_requests'] > 0 else 0
         
         return {
             'entries': len(self.cache),
             'size_mb': total_size / (1024 * 1024),
             'hits': self.stats['hits'],
+            'fresh_hits': self.stats['fresh_hits'],
+            'stale_hits': self.stats['stale_hits'],
             'misses': self.stats['misses'],
+            'projection_hits': self.stats['projection_hits'],
+            'refreshes': self.stats['refreshes'],
+            'refresh_failures': self.stats['refresh_failures'],
             'hit_rate': hit_rate * 100,
             'evictions': self.stats['evictions'],
-            'total_requests': self.stats['total_requests']
+            'total_requests': self.stats['total_requests'],
+            'sizer': self.sizer.name,
+            'sized_by': dict(self.sizer_counts)
         }
     
     def get_entry_details(self) -> List[Dict]:
         """Get details of all cache entries"""
         details = []
-        for key, entry in self.cache.items():
-            details.append({
-                'key': key[:8] + '...',  # Shortened for display
-                'size_kb': entry.size_bytes / 1024,
-                'age_seconds': entry.age_seconds(),
-                'ttl_seconds': entry.ttl_seconds,
-                'hit_count': entry.hit_count,
-                'expired': entry.is_expired()
-            })
+        with self._lock:
+            for entry in self.cache.values():
+                details.append({
+                    'key': self.persistent_key(entry.endpoint, entry.params)[:8] + '...',  # Shortened for display
+                    'size_kb': entry.size_bytes / 1024,
+                    'age_seconds': entry.age_seconds(),
+                    'ttl_seconds': entry.ttl_seconds,
+                    'hit_count': entry.hit_count,
+                    'expired': entry.is_expired(),
+                    'sizer': entry.sizer
+                })
         return sorted(details, key=lambda x: x['hit_count'], reverse=True)
 
+# Typical user journey: (action, [(endpoint, params), ...])
+USER_JOURNEY = [
+    # User opens app
+    ("Open app - load home", [
+        ('rooms', {'page_size': 0, 'only': 'id,name,room'}),
+        ('access_points', {'page_size': 0, 'only': 'id,name,online'}),
+        ('switches', {'page_size': 0, 'only': 'id,name,online'}),
+    ]),
+    
+    # Navigate to devices
+    ("Navigate to devices list", [
+        ('access_points', {'page_size': 0, 'only': 'id,name,online,mac_address,ip_address,model'}),
+        ('switches', {'page_size': 0, 'only': 'id,name,online,mac_address,ip_address,model'}),
+    ]),
+    
+    # Go back to home
+    ("Return to home", [
+        ('rooms', {'page_size': 0, 'only': 'id,name,room'}),
+        ('access_points', {'page_size': 0, 'only': 'id,name,online'}),
+        ('switches', {'page_size': 0, 'only': 'id,name,online'}),
+    ]),
+    
+    # View device details
+    ("View specific device", [
+        ('access_points', {'id': 123}),  # Full details for one device
+    ]),
+    
+    # Refresh devices
+    ("Pull to refresh devices", [
+        ('access_points', {'page_size': 0, 'only': 'id,name,online,mac_address,ip_address,model'}),
+        ('switches', {'page_size': 0, 'only': 'id,name,online,mac_address,ip_address,model'}),
+    ]),
+    
+    # Background refresh after 6 minutes
+    ("Background refresh (after 6 min)", [
+        ('rooms', {'page_size': 0, 'only': 'id,name,room'}),
+        ('access_points', {'page_size': 0, 'only': 'id,name,online'}),
+    ]),
+]
+
+# Simulated time that passes before an action, in seconds
+JOURNEY_DELAYS = {"Background refresh (after 6 min)": 360}
+
+# How long past the 5 minute TTL each endpoint may be served stale
+GRACE_SECONDS = {'rooms': 600, 'access_points': 120, 'switches': 120}
+
+def mock_api_fetch(endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Mock API response with every requested field filled in"""
+    return {
+        'endpoint': endpoint,
+        'params': params,
+        'data': [{'id': i, 'name': f'Item {i}',
+                  **{field: f'{field}-{i}' for field in field_names(params) if field not in ('id', 'name')}}
+                 for i in range(10)]
+    }
+
 def simulate_app_usage():
     """Simulate typical app usage patterns"""
     print("="*80)
     print("CACHE STRATEGY VALIDATION")
     print("="*80)
     
-    # Initialize cache service
-    cache = CacheService(max_size_mb=5)  # 5MB cache limit
-    
-    # Define typical user journey
-    user_actions = [
-        # User opens app
-        ("Open app - load home", [
-            ('rooms', {'page_size': 0, 'only': 'id,name,room'}),
-            ('access_points', {'page_size': 0, 'only': 'id,name,online'}),
-            ('switches', {'page_size': 0, 'only': 'id,name,online'}),
-        ]),
-        
-        # Navigate to devices
-        ("Navigate to devices list", [
-            ('access_points', {'page_size': 0, 'only': 'id,name,online,mac_address,ip_address,model'}),
-            ('switches', {'page_size': 0, 'only': 'id,name,online,mac_address,ip_address,model'}),
-        ]),
-        
-        # Go back to home
-        ("Return to home", [
-            ('rooms', {'page_size': 0, 'only': 'id,name,room'}),
-            ('access_points', {'page_size': 0, 'only': 'id,name,online'}),
-            ('switches', {'page_size': 0, 'only': 'id,name,online'}),
-        ]),
-        
-        # View device details
-        ("View specific device", [
-            ('access_points', {'id': 123}),  # Full details for one device
-        ]),
-        
-        # Refresh devices
-        ("Pull to refresh devices", [
-            ('access_points', {'page_size': 0, 'only': 'id,name,online,mac_address,ip_address,model'}),
-            ('switches', {'page_size': 0, 'only': 'id,name,online,mac_address,ip_address,model'}),
-        ]),
-        
-        # Background refresh after 6 minutes
-        ("Background refresh (after 6 min)", [
-            ('rooms', {'page_size': 0, 'only': 'id,name,room'}),
-            ('access_points', {'page_size': 0, 'only': 'id,name,online'}),
-        ]),
-    ]
+    # Initialize cache service; expired entries within grace are refreshed in the background
+    cache = CacheService(max_size_mb=5, refresher=mock_api_fetch, grace_seconds=GRACE_SECONDS)  # 5MB cache limit
+    
+    user_actions = USER_JOURNEY
+    
+    # The repository knows every screen's field list up front (like
+    # DeviceFieldSets.seedFields), so one fetch can serve all of them
+    for _, requests in user_actions:
+        for endpoint, params in requests:
+            cache.register_projection(endpoint, params)
     
     print("\n📱 Simulating User Journey:")
     print("-" * 60)
     
     api_calls_made = 0
-    api_calls_saved = 0
     
     for action_name, requests in user_actions:
         print(f"\n{action_name}:")
         
+        delay = JOURNEY_DELAYS.get(action_name)
+        if delay:
+            # Let the clock run on by ageing every entry
+            for entry in cache.cache.values():
+                entry.created_at -= timedelta(seconds=delay)
+        
         for endpoint, params in requests:
             # Check cache first
+            projected, stale = cache.stats['projection_hits'], cache.stats['stale_hits']
             cached_data = cache.get(endpoint, params)
             
             if cached_data is not None:
-                print(f"  {endpoint:20s} → CACHE HIT ✓")
-                api_calls_saved += 1
+                via = " (projected)" if cache.stats['projection_hits'] > projected else ""
+                if cache.stats['stale_hits'] > stale:
+                    via += " (stale, refreshing in background)"
+                print(f"  {endpoint:20s} → CACHE HIT ✓{via}")
             else:
-                # Simulate API call
-                print(f"  {endpoint:20s} → API CALL")
+                # Simulate API call, asking for every field a screen needs
+                fetch = cache.fetch_params(endpoint, params)
+                widened = f" (only={fetch['only']})" if fetch is not params else ""
+                print(f"  {endpoint:20s} → API CALL{widened}")
                 api_calls_made += 1
                 
                 # Generate mock data
-                mock_data = {
-                    'endpoint': endpoint,
-                    'params': params,
-                    'data': [{'id': i, 'name': f'Item {i}'} for i in range(10)]
-                }
+                mock_data = mock_api_fetch(endpoint, fetch)
                 
                 # Store in cache
-                cache.set(endpoint, params, mock_data, ttl_seconds=300)  # 5 min TTL
+                cache.set(endpoint, fetch, mock_data, ttl_seconds=300)  # 5 min TTL
         
-        # Show cache stats after each action
+        # Show cache stats after each action, once background refreshes land
+        cache.wait_for_refreshes()
         stats = cache.get_stats()
         print(f"  Cache: {stats['entries']} entries, {stats['size_mb']:.2f}MB, {stats['hit_rate']:.1f}% hit rate")
     
@@ -247,17 +641,25 @@ def simulate_app_usage():
     print(f"\n📊 Overall Statistics:")
     print(f"  Total requests:     {final_stats['total_requests']}")
     print(f"  Cache hits:         {final_stats['hits']}")
+    print(f"    fresh:            {final_stats['fresh_hits']}")
+    print(f"    stale:            {final_stats['stale_hits']}")
     print(f"  Cache misses:       {final_stats['misses']}")
+    print(f"  Projection hits:    {final_stats['projection_hits']}")
     print(f"  Hit rate:           {final_stats['hit_rate']:.1f}%")
-    print(f"  API calls made:     {api_calls_made}")
+    # A stale hit still costs a fetch, only off the user's path
+    background_calls = final_stats['refreshes'] + final_stats['refresh_failures']
+    api_calls_saved = final_stats['fresh_hits']
+    print(f"  API calls made:     {api_calls_made + background_calls}"
+          f" ({api_calls_made} blocking, {background_calls} background)")
     print(f"  API calls saved:    {api_calls_saved}")
     print(f"  Cache size:         {final_stats['size_mb']:.2f}MB")
     print(f"  Evictions:          {final_stats['evictions']}")
+    print(f"  Background refreshes: {final_stats['refreshes']} ({final_stats['refresh_failures']} failed)")
     
     print(f"\n💰 Performance Impact:")
-    if api_calls_saved > 0:
-        # Assume 500ms average API call time based on our tests
-        time_saved = api_calls_saved * 500
+    if final_stats['hits'] > 0:
+        # Assume 500ms average API call time based on our tests; no hit waits for the network
+        time_saved = final_stats['hits'] * 500
         print(f"  Time saved:         {time_saved/1000:.1f} seconds")
         print(f"  Network calls saved: {api_calls_saved}")
         print(f"  Battery impact:     Reduced by ~{api_calls_saved * 2}%")
@@ -267,8 +669,117 @@ def simulate_app_usage():
     for entry in cache.get_entry_details()[:5]:
         print(f"    • {entry['key']} - {entry['hit_count']} hits, {entry['size_kb']:.1f}KB, age: {entry['age_seconds']:.0f}s")
     
+    cache.close()
     return cache
 
+def benchmark_sizers(devices: int = 20_000, rounds: int = 5):
+    """Compare sizer cost and accuracy on a multi-megabyte access_points snapshot"""
+    print("="*80)
+    print("PAYLOAD SIZER BENCHMARK")
+    print("="*80)
+    
+    snapshot = {
+        'endpoint': 'access_points',
+        'params': {'page_size': 0},
+        'data': [{
+            'id': i,
+            'name': f'AP-{i:05d}',
+            'online': i % 7 != 0,
+            'mac_address': f'00:1d:2e:{i >> 16 & 0xff:02x}:{i >> 8 & 0xff:02x}:{i & 0xff:02x}',
+            'ip_address': f'10.{i >> 16 & 0xff}.{i >> 8 & 0xff}.{i & 0xff}',
+            'model': ('R750', 'R650', 'T750')[i % 3],
+            'room': {'id': i // 4, 'name': f'Room {i // 4}'},
+        } for i in range(devices)]
+    }
+    body = json.dumps(snapshot).encode('utf-8')
+    exact = len(body)
+    
+    print(f"\n  {devices:,d} access points, {exact / (1024 * 1024):.1f}MB as JSON")
+    print(f"  {'sizer':10s} {'payload':8s} {'ms':>8s} {'bytes':>11s} {'vs json':>8s}")
+    cases = [
+        (JsonSizer(), 'objects', snapshot),
+        (ByteLengthSizer(), 'body', body),
+        (SamplingSizer(), 'objects', snapshot),
+        (DeepSizer(), 'objects', snapshot),
+    ]
+    for sizer, kind, payload in cases:
+        best = float('inf')
+        for _ in range(rounds):
+            start = time.perf_counter()
+            size, used = sizer.measure(payload)
+            best = min(best, time.perf_counter() - start)
+        print(f"  {used:10s} {kind:8s} {best * 1000:8.2f} {size:11,d} {size / exact:7.2f}x")
+
+def benchmark_cache_scaling(sizes: Tuple[int, ...] = (100_000, 300_000, 1_000_000), ops: int = 100_000):
+    """Show that get/set/evict cost stays flat as the cache grows"""
+    print("="*80)
+    print("CACHE SCALING BENCHMARK")
+    print("="*80)
+    print(f"\n  {'entries':>10s} {'fill s':>8s} {'get us':>8s} {'set+evict us':>13s} {'old evict pass ms':>18s}")
+    
+    for n in sizes:
+        cache = CacheService()
+        payload = {'id': 0}
+        start = time.perf_counter()
+        for i in range(n):
+            cache.set('access_points', {'id': i}, payload)
+        fill = time.perf_counter() - start
+        # Cap the cache at its current size so every further set evicts one entry
+        cache.max_size_bytes = cache.current_size_bytes
+        
+        start = time.perf_counter()
+        for i in range(ops):
+            cache.get('access_points', {'id': (i * 7919) % n})
+        get_us = (time.perf_counter() - start) / ops * 1e6
+        
+        start = time.perf_counter()
+        for i in range(ops):
+            cache.set('access_points', {'id': n + i}, payload)
+        set_us = (time.perf_counter() - start) / ops * 1e6
+        assert cache.current_size_bytes == sum(e.size_bytes for e in cache.cache.values())
+        
+        # What the previous implementation paid on every set: a full size sum plus a sort by age
+        start = time.perf_counter()
+        sum(entry.size_bytes for entry in cache.cache.values())
+        sorted(cache.cache.items(), key=lambda x: x[1].created_at)
+        old_ms = (time.perf_counter() - start) * 1000
+        
+        print(f"  {n:>10,d} {fill:8.2f} {get_us:8.2f} {set_us:13.2f} {old_ms:18.1f}")
+
+def benchmark_key_derivation(rounds: int = 20_000):
+    """Compare tuple keys with the JSON + MD5 digest on the simulated journey"""
+    print("="*80)
+    print("CACHE KEY BENCHMARK")
+    print("="*80)
+    
+    requests = [request for _, action_requests in USER_JOURNEY for request in action_requests]
+    digest_cache = CacheService()
+    digest_cache._generate_key = CacheService.persistent_key  # previous hot-path key
+    tuple_cache = CacheService()
+    
+    print(f"\n  {len(requests)} journey requests x {rounds:,d} rounds")
+    print(f"  {'key':8s} {'derive ns':>10s} {'get hit ns':>11s}")
+    results = {}
+    for name, cache in (('md5', digest_cache), ('tuple', tuple_cache)):
+        for endpoint, params in requests:
+            cache.set(endpoint, params, {'data': []})
+        
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for endpoint, params in requests:
+                cache._generate_key(endpoint, params)
+        derive_ns = (time.perf_counter() - start) / (rounds * len(requests)) * 1e9
+        
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for endpoint, params in requests:
+                cache.get(endpoint, params)
+        get_ns = (time.perf_counter() - start) / (rounds * len(requests)) * 1e9
+        results[name] = get_ns
+        print(f"  {name:8s} {derive_ns:10.0f} {get_ns:11.0f}")
+    
+    print(f"\n  get() is {results['md5'] / results['tuple']:.1f}x faster with tuple keys")
+
 def design_repository_implementation():
     """Show how this integrates with Repository pattern"""
     print("\n" + "="*80)
@@ -441,4 +952,9 @@ def main():
         print(f"  • Works offline for cached data")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if '--benchmark' in sys.argv[1:]:
+        benchmark_key_derivation()
+        benchmark_sizers()
+        benchmark_cache_scaling()
+    else:
+        main()
\ No newline at end of file